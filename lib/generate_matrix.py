@@ -1,18 +1,180 @@
-import random
+"""
+Generates random systems of linear equations [A|B] for lab1.
 
-file = open("..data/random_data/random_matrix.txt", mode="w")
-N = int(input("Enter matrix size: "))
-file.write(str(N))
+The matrix is built in one vectorized pass with a seeded generator, so the same
+arguments always give the same system, and written in bulk.
 
-for i in range(N**2):
-    if (i % N == 0):
-        file.write("\n")
+Kinds:
+- dominant: dense, strictly diagonally dominant
+- banded: diagonally dominant with the given number of diagonals on each side
+- sparse: diagonally dominant with about the given number of non-zero elements per row
+- spd: symmetric positive definite (symmetric, dominant, positive diagonal) and sparse
 
-    if (i+1)%N == 0:
-        endpoint = ""
+Formats:
+- text: the rows of [A|B] for the dominant kind, "coo N" and the triples
+  "i j value" for the sparse kinds (both accepted by the bot as a message)
+- binary: the binary matrix file of tools.save_binary_matrix (dense)
+
+The right-hand side is B = A x for a random integer vector x, so the exact solution is known.
+
+Usage examples (from the repository root):
+    python -m lib.generate_matrix 10
+    python -m lib.generate_matrix 1500 --format binary --seed 1
+    python -m lib.generate_matrix 100000 --kind banded --width 2 -o data/random_data/banded.txt
+"""
+
+import argparse
+import os
+import numpy as np
+from scipy import sparse
+from src.scripts.tools import save_binary_matrix
+
+
+random_data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "random_data"))
+
+KINDS = ("dominant", "banded", "sparse", "spd")
+
+# Largest size of a dense matrix: the dominant kind and the binary format, 8 * N^2 bytes
+MAX_DENSE_SIZE = 20000
+
+
+def with_dominant_diagonal(off_diagonal, rng, dominance: float, positive: bool = False):
+    """Adds the diagonal |a_ii| = dominance * (sum of |a_ij|, j != i) + 1 to a matrix with a zero diagonal"""
+    row_sums = np.asarray(abs(off_diagonal).sum(axis=1)).ravel()
+    sign = 1 if positive else rng.choice([-1.0, 1.0], len(row_sums))
+    diagonal = sign * (dominance * row_sums + 1)
+
+    if sparse.issparse(off_diagonal):
+        return (off_diagonal + sparse.diags_array(diagonal)).tocsr()
+
+    off_diagonal[np.diag_indices_from(off_diagonal)] = diagonal
+
+    return off_diagonal
+
+
+def dominant_matrix(n: int, rng, dominance: float) -> np.ndarray:
+    A = rng.integers(-100, 101, (n, n)).astype(float)
+    A[np.diag_indices_from(A)] = 0
+
+    return with_dominant_diagonal(A, rng, dominance)
+
+
+def banded_matrix(n: int, rng, dominance: float, width: int):
+    offsets = [k for k in range(-width, width + 1) if k != 0 and abs(k) < n]
+    diagonals = [rng.integers(-100, 101, n - abs(k)).astype(float) for k in offsets]
+
+    return with_dominant_diagonal(sparse.diags_array(diagonals, offsets=offsets, shape=(n, n), format="csr"), rng, dominance)
+
+
+def random_off_diagonal(n: int, rng, per_row: int):
+    """Random sparse matrix with about per_row non-zero elements per row off the diagonal"""
+    rows = np.repeat(np.arange(n), per_row)
+    columns = rng.integers(0, n, n * per_row)
+    values = rng.integers(-100, 101, n * per_row).astype(float)
+
+    off = rows != columns
+
+    # Repeated positions are summed
+    return sparse.csr_array((values[off], (rows[off], columns[off])), shape=(n, n))
+
+
+def sparse_matrix(n: int, rng, dominance: float, per_row: int):
+    return with_dominant_diagonal(random_off_diagonal(n, rng, per_row), rng, dominance)
+
+
+def spd_matrix(n: int, rng, dominance: float, per_row: int):
+    # A symmetric strictly diagonally dominant matrix with a positive diagonal is positive definite
+    S = random_off_diagonal(n, rng, max(1, per_row // 2))
+
+    return with_dominant_diagonal(S + S.T, rng, dominance, positive=True)
+
+
+def generate_system(n: int, kind: str = "dominant", seed=None, dominance: float = 1.5, width: int = 2, per_row: int = 5):
+    """
+    Builds a random system of the given kind.
+
+    Returns:
+        tuple: (A, B, x) - the matrix (NumPy array for the dominant kind, SciPy CSR otherwise),
+               the constants vector and the exact solution
+    """
+    rng = np.random.default_rng(seed)
+
+    if kind == "dominant":
+        A = dominant_matrix(n, rng, dominance)
+    elif kind == "banded":
+        A = banded_matrix(n, rng, dominance, width)
+    elif kind == "sparse":
+        A = sparse_matrix(n, rng, dominance, per_row)
+    elif kind == "spd":
+        A = spd_matrix(n, rng, dominance, per_row)
+    else:
+        raise NameError
+
+    x = rng.integers(-10, 11, n).astype(float)
+
+    return A, A @ x, x
+
+
+def write_text(path: str, A, B) -> None:
+    n = len(B)
+
+    if sparse.issparse(A):
+        A = A.tocoo()
+        triples = np.column_stack([np.concatenate([A.row, np.arange(n)]) + 1,
+                                   np.concatenate([A.col, np.full(n, n)]) + 1,
+                                   np.concatenate([A.data, B])])
+
+        np.savetxt(path, triples, fmt=["%d", "%d", "%.17g"], header=f"coo {n}", comments="")
     else:
-        endpoint = " "
+        np.savetxt(path, np.column_stack([A, B]), fmt="%.17g")
+
+
+def write_binary(path: str, A, B) -> None:
+    if sparse.issparse(A):
+        A = A.toarray()
+
+    save_binary_matrix(path, np.column_stack([A, B]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates a random system of linear equations for lab1")
+
+    parser.add_argument("size", type=int, help="number of unknowns")
+    parser.add_argument("--kind", choices=KINDS, default="dominant")
+    parser.add_argument("--format", choices=("text", "binary"), default="text")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the generator, the same seed gives the same system")
+    parser.add_argument("--dominance", type=float, default=1.5,
+                        help="ratio of |a_ii| to the sum of the other elements of the row, > 1")
+    parser.add_argument("--width", type=int, default=2, help="number of diagonals on each side (banded)")
+    parser.add_argument("--per-row", type=int, default=5, help="non-zero elements per row (sparse, spd)")
+    parser.add_argument("-o", "--output", help="output file, data/random_data/random_matrix.txt (.bin) by default")
+
+    args = parser.parse_args()
+
+    if args.size < 1:
+        parser.error("size must be positive")
+
+    if args.dominance <= 1:
+        parser.error("dominance must be greater than 1")
+
+    if args.kind == "dominant" and args.size > MAX_DENSE_SIZE:
+        parser.error(f"dominant kind is dense, use banded, sparse or spd kinds for sizes larger than {MAX_DENSE_SIZE}")
+
+    if args.format == "binary" and args.size > MAX_DENSE_SIZE:
+        parser.error(f"binary format is dense, use text format for sparse kinds larger than {MAX_DENSE_SIZE}")
+
+    extension = "bin" if args.format == "binary" else "txt"
+    path = args.output or os.path.join(random_data_dir, f"random_matrix.{extension}")
+
+    A, B, _ = generate_system(args.size, args.kind, args.seed, args.dominance, args.width, args.per_row)
+
+    if args.format == "binary":
+        write_binary(path, A, B)
+    else:
+        write_text(path, A, B)
+
+    print(f"{args.kind} system {args.size}x{args.size} was written to {path}")
 
-    file.write(str(random.randint(-100, 100)) + endpoint)
 
-file.close()
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,12 @@
 import telebot
 from telebot import types
 import json
-import sys
 import re
 import os
 from .scripts.lab1 import find_system_of_linear_equations_roots
-from .scripts.lab2 import bisection_method, secant_method, simple_iteration_method, newton_method
-from .scripts.lab3 import calculate_integral
-from .scripts.tools import plot_function_with_highlight
+from .scripts.lab2 import bisection_method, brent_method, find_all_roots, secant_method, simple_iteration_method, steffensen_method, newton_method, broyden_method, newton_basins
+from .scripts.lab3 import calculate_integral, compare_methods
+from .scripts.tools import plot_function_with_highlight, plot_basins, parse_sparse_matrix, load_binary_matrix
 from lib.integratedAITools import ai_tools
 from random import randint
 
@@ -36,6 +35,7 @@ data_dir = os.path.abspath(os.path.join(src_dir, "..", "data"))
 
 configuration_data_dir = os.path.abspath(os.path.join(data_dir, "configuration_data"))
 graph_storage_dir = os.path.abspath(os.path.join(data_dir, "graph_storage"))
+matrix_storage_dir = os.path.abspath(os.path.join(data_dir, "matrix_storage"))
 current_configuration = os.path.abspath(os.path.join(configuration_data_dir, "current_configuration.txt"))
 graph_png = os.path.abspath(os.path.join(graph_storage_dir, "graph.png"))
 
@@ -48,8 +48,6 @@ config_json.close()
 token = config_data.get("token")
 admins:dict = config_data.get("admins")
 
-sys.setrecursionlimit(100000)
-
 
 
 #------messages--------------
@@ -87,6 +85,9 @@ current_page = 0
 
 VERIFIED_STATE = False
 
+# Largest file the Bot API lets a bot download, 8 * N * (N + 1) bytes for a matrix N x (N + 1)
+MAX_DOWNLOAD_SIZE = 20 * 1024 * 1024
+
 
 
 #------telebot---------------
@@ -97,7 +98,7 @@ processor = ai_tools.MathFunctionProcessor()
 
 #------functions-------------
 
-def send_analyze(message: types.Message, equation: str, interval: tuple, result):
+def send_analyze(message: types.Message, equation: str, interval: tuple, result, summary: str = None):
     desc, graph, audio = processor.process_function(equation)
     print(f"Текстовое описание:\n{desc}")
     print(f"График сохранен: {graph}")
@@ -108,7 +109,10 @@ def send_analyze(message: types.Message, equation: str, interval: tuple, result)
 
     bot.send_photo(message.chat.id, img)
     bot.send_voice(message.chat.id, audio_file)
-    bot.send_message(message.chat.id, f"Integral value: {result[0]}\nIntervals count: {result[1]}")
+    if summary is None:
+        summary = f"Integral value: {result[0]}\nIntervals count: {result[1]}"
+
+    bot.send_message(message.chat.id, summary, parse_mode="HTML")
 
     audio_file.close()
 
@@ -257,6 +261,7 @@ def clear_parameters(message):
     global INTERVAL, ACCURACY, MATRIX, EQUATION, SYSTEM_OF_EQUATIONS
 
     INTERVAL = ACCURACY = MATRIX = EQUATION = SYSTEM_OF_EQUATIONS = DEFAULT_VALUE
+    clear_matrix_storage()
 
     bot.send_message(message.chat.id, "Parameters were cleared!")
 
@@ -381,8 +386,16 @@ def matrix_handle(message):
 
     markup.add(types.InlineKeyboardButton("Set matrix data", callback_data="set_matrix"))
 
+    # A sparse matrix is described by its size, its elements may not fit into a message
+    if hasattr(MATRIX, "nnz"):
+        matrix_display = f"sparse {MATRIX.shape[0]}x{MATRIX.shape[0]}, {MATRIX.nnz} non-zero elements"
+    elif hasattr(MATRIX, "shape"):
+        matrix_display = f"binary {MATRIX.shape[0]}x{MATRIX.shape[1]}"
+    else:
+        matrix_display = MATRIX
+
     #TODO: refactor
-    bot.send_message(message.chat.id, f"Matrix data = <code>{MATRIX}</code>\nYou can set new:", reply_markup=markup)
+    bot.send_message(message.chat.id, f"Matrix data = <code>{matrix_display}</code>\nYou can set new:", reply_markup=markup)
 
 @bot.callback_query_handler(func=lambda call: call.data == "set_matrix")
 def set_matrix_handle(call, flag=False):
@@ -392,10 +405,21 @@ def set_matrix_handle(call, flag=False):
 def set_matrix_by_keyboard(message, flag):
     global MATRIX
 
-    if re.fullmatch(regex_data.get("matrix").get("regex"), message.text):
+    if message.content_type == "document":
+        set_matrix_by_document(message)
+    elif message.text is None:
+        bot.send_message(message.chat.id, "error!")
+    elif re.fullmatch(regex_data.get("matrix").get("regex"), message.text):
         MATRIX = [el.split() for el in message.text.split("\n")]
 
         bot.send_message(message.chat.id, "Matrix was set!")
+    elif re.fullmatch(regex_data.get("sparse_matrix").get("regex"), message.text):
+        try:
+            MATRIX = parse_sparse_matrix(message.text)
+
+            bot.send_message(message.chat.id, "Sparse matrix was set!")
+        except ValueError as e:
+            bot.send_message(message.chat.id, f"error! {e}")
     else:
         bot.send_message(message.chat.id, "error!")
 
@@ -403,6 +427,68 @@ def set_matrix_by_keyboard(message, flag):
         solve_system(message)
 
 
+#? Binary matrix file
+@bot.message_handler(content_types=["document"])
+def set_matrix_by_document(message):
+    global MATRIX
+
+    if (message.document.file_size or 0) > MAX_DOWNLOAD_SIZE:
+        bot.send_message(message.chat.id, warning_messages.get("upload_size_warning_message"), parse_mode="HTML")
+        return
+
+    # The size may be unknown before the download, then the Bot API refuses it
+    try:
+        file_info = bot.get_file(message.document.file_id)
+        downloaded_file = bot.download_file(file_info.file_path)
+    except telebot.apihelper.ApiException:
+        bot.send_message(message.chat.id, warning_messages.get("upload_size_warning_message"), parse_mode="HTML")
+        return
+
+    # Every upload gets its own file: the previous matrix may still be mapped into memory.
+    # The same file sent again is already stored and must not be rewritten while mapped
+    os.makedirs(matrix_storage_dir, exist_ok=True)
+    matrix_path = os.path.join(matrix_storage_dir, f"{message.document.file_unique_id}.bin")
+
+    if not os.path.exists(matrix_path):
+        with open(matrix_path, "wb") as file:
+            file.write(downloaded_file)
+
+    try:
+        matrix = load_binary_matrix(matrix_path)
+
+        # The system is stored as the augmented matrix [A|B]
+        if matrix.shape[1] != matrix.shape[0] + 1:
+            raise ValueError(f"Ожидается матрица N x (N + 1) (коэффициенты и свободные члены), получена {matrix.shape[0]}x{matrix.shape[1]}")
+
+    except ValueError as e:
+        if not (hasattr(MATRIX, "filename") and os.path.samefile(MATRIX.filename, matrix_path)):
+            os.remove(matrix_path)
+
+        bot.send_message(message.chat.id, f"error! {e}")
+        return
+
+    MATRIX = matrix
+    clear_matrix_storage(keep=matrix_path)
+
+    bot.send_message(message.chat.id, f"Matrix {MATRIX.shape[0]}x{MATRIX.shape[1]} was set!")
+
+
+def clear_matrix_storage(keep=None):
+    """Deletes the uploaded matrix files except keep"""
+    if not os.path.isdir(matrix_storage_dir):
+        return
+
+    for name in os.listdir(matrix_storage_dir):
+        path = os.path.join(matrix_storage_dir, name)
+
+        if keep is None or not os.path.samefile(path, keep):
+            # A file still mapped into memory cannot be deleted on Windows, it is left for the next time
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
 #? Equation button
 @bot.message_handler(func=lambda msg: msg.text == "Equation")
 def linear_equation_handle(message):
@@ -437,7 +523,7 @@ def system_linear_equations_handle(message):
 
     markup.add(types.InlineKeyboardButton("Set system of equations", callback_data="set_system"))
 
-    bot.send_message(message.chat.id, f"System of equations = <code>{EQUATION}</code>\nYou can set new:", reply_markup=markup)
+    bot.send_message(message.chat.id, f"System of equations = <code>{SYSTEM_OF_EQUATIONS}</code>\nYou can set new:", reply_markup=markup, parse_mode="HTML")
 
 @bot.callback_query_handler(func=lambda call: call.data == "set_system")
 def set_system_of_linear_equations_handle(call):
@@ -445,10 +531,10 @@ def set_system_of_linear_equations_handle(call):
     bot.register_next_step_handler_by_chat_id(call.from_user.id, set_system_of_equations_by_keyboard)
 
 def set_system_of_equations_by_keyboard(message):
-    global EQUATION
+    global SYSTEM_OF_EQUATIONS
 
     #TODO: refactor
-    EQUATION = message.text
+    SYSTEM_OF_EQUATIONS = message.text
 
     bot.send_message(message.chat.id, "System of equations was set!")
 
@@ -471,14 +557,45 @@ def solve(message):
 
 
 #? Solve system
+LINEAR_METHODS = {"Auto method": "auto", "Jacobi method": "jacobi", "Gauss-Seidel method": "gauss_seidel",
+                  "SOR method": "sor", "Conjugate gradient method": "cg", "LU decomposition": "lu",
+                  "Parallel Jacobi method": "block_jacobi"}
+
 @bot.message_handler(func=lambda msg: msg.text == "Solve system of linear equations")
+def solve_system_of_linear_equations(message):
+    global current_page
+
+    current_page = 2
+
+    markup = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=False)
+
+    markup.add(types.KeyboardButton("Jacobi method"), types.KeyboardButton("Parallel Jacobi method"))
+    markup.add(types.KeyboardButton("Gauss-Seidel method"), types.KeyboardButton("SOR method"))
+    markup.add(types.KeyboardButton("Conjugate gradient method"))
+    markup.add(types.KeyboardButton("Auto method"), types.KeyboardButton("LU decomposition"))
+    markup.add(types.KeyboardButton("⬅️"))
+
+    bot.send_message(message.chat.id, "which method do u want to use?", reply_markup=markup)
+
+@bot.message_handler(func=lambda msg: msg.text in LINEAR_METHODS)
 def solve_system(message):
     id = message.chat.id
 
-    if (ACCURACY != 0) and (MATRIX != ""):
-        result = find_system_of_linear_equations_roots(MATRIX, ACCURACY)
+    # Called back after setting the accuracy or the matrix, the text is not a method name then
+    method = LINEAR_METHODS.get(message.text, "auto")
 
-        bot.send_message(id, result, parse_mode="HTML")
+    # A sparse matrix cannot be compared with a string
+    matrix_empty = isinstance(MATRIX, str) and MATRIX == ""
+
+    if (ACCURACY != 0) and not matrix_empty:
+        def send_forecast(rho, predicted):
+            iterations = predicted if predicted is not None else "∞"
+            bot.send_message(id, info_messages.get("forecast_message").format(rho=rho, iterations=iterations), parse_mode="HTML")
+
+        result = find_system_of_linear_equations_roots(MATRIX, ACCURACY, method, notify=send_forecast)
+
+        # Warnings come back as keys of messages.json
+        bot.send_message(id, warning_messages.get(result, result), parse_mode="HTML")
 
     else:
         if ACCURACY == 0:
@@ -488,7 +605,7 @@ def solve_system(message):
             bot.send_message(id, "Your accuracy is 0", reply_markup=markup_acc)
             return
 
-        if MATRIX == "":
+        if matrix_empty:
             markup_matrix = types.InlineKeyboardMarkup()
             markup_matrix.add(types.InlineKeyboardButton("set matrix", callback_data="go_to_matrix"))
 
@@ -513,27 +630,45 @@ def solve_non_linear_equation(message):
     current_page = 2
 
     markup = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=False)
-    markup.add(types.KeyboardButton("Bisection method"), types.KeyboardButton("Secant method"))
-    markup.add(types.KeyboardButton("Simple iteration method"))
+    markup.add(types.KeyboardButton("Bisection method"), types.KeyboardButton("Secant method"), types.KeyboardButton("Brent method"))
+    markup.add(types.KeyboardButton("Simple iteration method"), types.KeyboardButton("Steffensen method"))
+    markup.add(types.KeyboardButton("All roots"))
     markup.add(types.KeyboardButton("⬅️"))
 
     bot.send_message(message.chat.id, "Choose which method do u want to use?", reply_markup=markup)
 
-@bot.message_handler(func=lambda msg: msg.text in ["Bisection method", "Secant method", "Simple iteration method"])
+@bot.message_handler(func=lambda msg: msg.text in ["Bisection method", "Secant method", "Brent method", "Simple iteration method", "Steffensen method"])
 def methods_handle(message):
     result = ""
 
     if message.text == "Bisection method":
-        result = bisection_method(EQUATION, INTERVAL[0], INTERVAL[1], ACCURACY, 0)
+        result = bisection_method(EQUATION, INTERVAL[0], INTERVAL[1], ACCURACY)
     elif message.text == "Secant method":
         result = secant_method(EQUATION, INTERVAL[0], INTERVAL[1], ACCURACY)
+    elif message.text == "Brent method":
+        result = brent_method(EQUATION, INTERVAL[0], INTERVAL[1], ACCURACY)
     elif message.text == "Simple iteration method":
         result = simple_iteration_method(EQUATION, INTERVAL[0], INTERVAL[1], ACCURACY)
+    elif message.text == "Steffensen method":
+        result = steffensen_method(EQUATION, INTERVAL[0], INTERVAL[1], ACCURACY)
 
-    if result.count(None) > 0:
+    # The contraction factor of the Steffensen method may be unknown when the root is found at once
+    if result[:4].count(None) > 0:
         print("error")
+    elif message.text == "Steffensen method":
+        q = result[4] if result[4] is not None else "not estimated"
+        bot.send_message(message.chat.id, f"Root: {result[0]}\nf(root): {result[1]}\niteration number: {result[2]}\nfunction evaluations: {result[3]}\ncontraction factor: {q}")
     else:
-        bot.send_message(message.chat.id, f"Root: {result[0]}\nf(root): {result[1]}\niteration number: {result[2]}")
+        bot.send_message(message.chat.id, f"Root: {result[0]}\nf(root): {result[1]}\niteration number: {result[2]}\nfunction evaluations: {result[3]}")
+
+
+@bot.message_handler(func=lambda msg: msg.text == "All roots")
+def all_roots_handle(message):
+    roots, values, iterations, evaluations = find_all_roots(EQUATION, INTERVAL[0], INTERVAL[1], ACCURACY)
+
+    output = "".join(f"x = {x}, f(x) = {fx}\n" for x, fx in zip(roots, values))
+
+    bot.send_message(message.chat.id, f"Roots found: {len(roots)}\n{output}\niteration number: {iterations}\nfunction evaluations: {evaluations}")
 
 
 #? Solve system
@@ -545,7 +680,8 @@ def solve_system_of_non_linear_equations(message):
 
     markup = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=False)
 
-    markup.add(types.KeyboardButton("Newton method"))
+    markup.add(types.KeyboardButton("Newton method"), types.KeyboardButton("Broyden method"))
+    markup.add(types.KeyboardButton("Newton basins"))
     markup.add(types.KeyboardButton("⬅️"))
 
     bot.send_message(message.chat.id, "which method do u want to use?", reply_markup=markup)
@@ -557,7 +693,33 @@ def newton_solve(message):
     send_analyze(message, SYSTEM_OF_EQUATIONS.split(";")[0], INTERVAL, result)
     send_analyze(message, SYSTEM_OF_EQUATIONS.split(";")[1].replace("y", "x"), INTERVAL, result)
 
-    bot.send_message(message.chat.id, f"x: {result[0]}\ny:{result[1]}\nf1(x, y): {result[2]}\nf2(x, y): {result[3]}\niteration numbers: {result[4]}")
+    bot.send_message(message.chat.id, f"x: {result[0]}\ny:{result[1]}\nf1(x, y): {result[2]}\nf2(x, y): {result[3]}\niteration numbers: {result[4]}\nevaluations of F and J: {result[5]}")
+
+
+@bot.message_handler(func=lambda msg: msg.text == "Broyden method")
+def broyden_solve(message):
+    root, values, iterations, evaluations = broyden_method(SYSTEM_OF_EQUATIONS, [INTERVAL[0], INTERVAL[1]], ACCURACY)
+
+    if root is None:
+        print("error")
+        return
+
+    bot.send_message(message.chat.id, f"root: {root}\nF(root): {values}\niteration numbers: {iterations}\nfunction evaluations: {evaluations}")
+
+
+@bot.message_handler(func=lambda msg: msg.text == "Newton basins")
+def newton_basins_solve(message):
+    try:
+        roots, labels = newton_basins(SYSTEM_OF_EQUATIONS, INTERVAL, INTERVAL, ACCURACY)
+    except ValueError as e:
+        bot.send_message(message.chat.id, f"error! {e}\nNewton basins are drawn for a system of two equations in two unknowns")
+        return
+
+    img = plot_basins(labels, roots, INTERVAL, INTERVAL)
+    output = "".join(f"x: {x}, y: {y}\n" for x, y in roots)
+
+    bot.send_photo(message.chat.id, img)
+    bot.send_message(message.chat.id, f"Distinct roots found: {len(roots)}\n{output}")
 
 
 #? Solve integral
@@ -572,6 +734,8 @@ def solve_integral(message):
     markup.add(types.KeyboardButton("Left rectangles method"), types.KeyboardButton("Middle rectangles method"), types.KeyboardButton("Right rectangles method"))
     markup.add(types.KeyboardButton("Trapezoidal method"))
     markup.add(types.KeyboardButton("Simpson method"))
+    markup.add(types.KeyboardButton("Romberg method"), types.KeyboardButton("Gauss-Kronrod method"))
+    markup.add(types.KeyboardButton("Compare all methods"))
     markup.add(types.KeyboardButton("⬅️"))
 
     bot.send_message(message.chat.id, "Choose integral solving method:", reply_markup=markup)
@@ -604,4 +768,29 @@ def solve_simpson(message):
     
     send_analyze(message, EQUATION, INTERVAL, result)
 
+
+@bot.message_handler(func=lambda msg: msg.text == "Romberg method")
+def solve_romberg(message):
+    result = calculate_integral("romberg", EQUATION, INTERVAL[0], INTERVAL[1], ACCURACY)
+
+    send_analyze(message, EQUATION, INTERVAL, result)
+
+
+@bot.message_handler(func=lambda msg: msg.text == "Gauss-Kronrod method")
+def solve_gauss_kronrod(message):
+    result = calculate_integral("gauss_kronrod", EQUATION, INTERVAL[0], INTERVAL[1], ACCURACY)
+
+    send_analyze(message, EQUATION, INTERVAL, result, f"Integral value: {result[0]}\nError estimate: {result[1]}\nFunction evaluations: {result[2]}")
+
+
+@bot.message_handler(func=lambda msg: msg.text == "Compare all methods")
+def solve_compare_methods(message):
+    results, evaluations = compare_methods(EQUATION, INTERVAL[0], INTERVAL[1], ACCURACY)
+
+    table = f"{'method':<16}{'integral':<22}{'n':<10}error\n"
+    for method, (value, n, error) in results.items():
+        table += f"{method:<16}{value:<22.15g}{n:<10}{error:.3g}\n"
+
+    send_analyze(message, EQUATION, INTERVAL, results, f"<pre>{table}</pre>\nFunction evaluations: {evaluations}")
+
 bot.infinity_polling()
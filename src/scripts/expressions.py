@@ -0,0 +1,145 @@
+import ast
+import math
+from functools import lru_cache
+import numpy as np
+import sympy
+
+
+# Names available to the expressions evaluated on single numbers
+MATH_NAMES = {'math': math, 'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
+              'exp': math.exp, 'log': math.log, 'sqrt': math.sqrt, 'abs': abs,
+              'pi': math.pi, 'e': math.e}
+
+# Names available to the expressions evaluated on whole NumPy arrays
+NUMPY_NAMES = {'math': np, 'sin': np.sin, 'cos': np.cos, 'tan': np.tan,
+               'exp': np.exp, 'log': np.log, 'sqrt': np.sqrt, 'abs': np.abs,
+               'pi': np.pi, 'e': np.e}
+
+# Names for building symbolic expressions: the compiled function called on sympy symbols
+SYMPY_NAMES = {'math': sympy, 'sin': sympy.sin, 'cos': sympy.cos, 'tan': sympy.tan,
+               'exp': sympy.exp, 'log': sympy.log, 'sqrt': sympy.sqrt, 'abs': sympy.Abs,
+               'pi': sympy.pi, 'e': sympy.E}
+
+BACKENDS = {'math': MATH_NAMES, 'numpy': NUMPY_NAMES, 'sympy': SYMPY_NAMES}
+
+_ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Constant,
+                  ast.Attribute, ast.Load, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow,
+                  ast.Mod, ast.FloorDiv, ast.USub, ast.UAdd)
+
+
+def normalize_expression(expression: str) -> str:
+    """
+    Brings an expression to the canonical text used as the cache key.
+
+    '^' is replaced with '**', an equation "left = right" becomes "(left) - (right)"
+    and all whitespace runs are collapsed.
+    """
+
+    expression = expression.strip().replace('^', '**')
+
+    if '=' in expression:
+        left, right = expression.split('=', 1)
+        expression = f"({left.strip()}) - ({right.strip()})"
+
+    return " ".join(expression.split())
+
+
+def _validate(tree: ast.Expression, variables: tuple, names: dict, module) -> None:
+    """Checks once that the parsed expression uses only arithmetic, the variables and the allowed names"""
+
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ValueError(f"Использование '{type(node).__name__}' запрещено")
+
+        if isinstance(node, ast.Name) and node.id not in variables and node.id not in names:
+            raise ValueError(f"Использование '{node.id}' запрещено")
+
+        if isinstance(node, ast.Attribute):
+            if not (isinstance(node.value, ast.Name) and node.value.id == 'math'):
+                raise ValueError("Разрешены только атрибуты модуля math")
+
+            if node.attr.startswith('_') or not hasattr(math, node.attr) or not hasattr(module, node.attr):
+                raise ValueError(f"Использование 'math.{node.attr}' запрещено")
+
+        if isinstance(node, ast.Call) and node.keywords:
+            raise ValueError("Именованные аргументы запрещены")
+
+        if isinstance(node, ast.Constant) and not isinstance(node.value, (int, float, complex)):
+            raise ValueError(f"Использование '{node.value!r}' запрещено")
+
+
+@lru_cache(maxsize=256)
+def _compile(expression: str, variables: tuple, backend: str):
+    names = BACKENDS[backend]
+
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Ошибка в выражении '{expression}': {e.msg}")
+
+    _validate(tree, variables, names, names['math'])
+
+    # The validated expression becomes the body of a real function, so a call costs
+    # no parsing and no building of the names dict
+    source = f"lambda {', '.join(variables)}: {ast.unparse(tree.body)}"
+
+    return eval(compile(source, "<expression>", "eval"), {'__builtins__': {}, **names})
+
+
+def compile_expression(expression: str, variables: tuple = ('x',), backend: str = 'math'):
+    """
+    Compiles a user expression into a function of the given variables.
+
+    The expression is normalized, parsed and validated only once: the result is kept in
+    an LRU cache keyed by the normalized text, so every solver gets the same precompiled
+    callable for the same expression.
+
+    Parameters:
+    - expression: string like "x**2 - 4", "sin(x) = 0.5" or "math.cos(x)"
+    - variables: names of the arguments of the function
+    - backend: 'math' for single numbers, 'numpy' for whole arrays,
+      'sympy' for symbolic expressions (call the function on sympy symbols)
+
+    Raises:
+        ValueError: If the expression cannot be parsed or uses forbidden names.
+
+    Usage examples:
+    >>> f = compile_expression("x^2 - 4")
+    >>> f(2) # returns 0
+    >>> F = compile_expression("x*y = 1", ('x', 'y'))
+    >>> F(1, 1) # returns 0
+    """
+
+    return _compile(normalize_expression(expression), tuple(variables), backend)
+
+
+def free_variables(expression: str) -> list:
+    """
+    Returns the names of the unknowns used in the expression, i.e. all names that are
+    not functions or constants: x, y, z first, then the rest in natural order (x1, x2, ..., x10).
+
+    Usage examples:
+    >>> free_variables("x1**2 + x2 = sin(x10)")
+    ['x1', 'x2', 'x10']
+    """
+
+    try:
+        tree = ast.parse(normalize_expression(expression), mode='eval')
+    except SyntaxError as e:
+        raise ValueError(f"Ошибка в выражении '{expression}': {e.msg}")
+
+    names = {node.id for node in ast.walk(tree) if isinstance(node, ast.Name)} - set(MATH_NAMES)
+
+    return sort_variables(names)
+
+
+def sort_variables(names) -> list:
+    """Orders unknowns as x, y, z first, then by name with the numeric suffixes compared as numbers"""
+
+    def key(name):
+        prefix = name.rstrip('0123456789')
+        suffix = name[len(prefix):]
+
+        return ('xyz'.find(name) if name in ('x', 'y', 'z') else 3, prefix, int(suffix) if suffix else -1)
+
+    return sorted(names, key=key)
@@ -1,6 +1,41 @@
+import math
+import os
+import hashlib
+import warnings
+import multiprocessing
+from collections import OrderedDict
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from threading import BrokenBarrierError, Thread
 import numpy as np
+from scipy import sparse
+from scipy.linalg import lu_factor, lu_solve, LinAlgWarning
+from scipy.optimize import linear_sum_assignment
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching, reverse_cuthill_mckee
+from scipy.sparse.linalg import spsolve_triangular, splu
 
-def is_diagonally(matrix: np.ndarray) -> bool:
+
+# LU factorizations of the last matrices: hash of the matrix -> (function solving A x = B, size in bytes)
+FACTORIZATION_CACHE_BYTES = 2**30
+_factorizations = OrderedDict()
+
+# Largest systems solved by LU: estimated operations of the factorization and entries of the factors
+DIRECT_MAX_OPERATIONS = 2e10
+DIRECT_MAX_ENTRIES = 5e7
+
+
+def absolute_row_sums(matrix, block: int = 1024) -> np.ndarray:
+    """
+    Returns the sums of absolute values of the rows for a NumPy array or a SciPy sparse matrix.
+    A dense matrix is summed by blocks of rows, so a large memory-mapped one is not copied.
+    """
+    if sparse.issparse(matrix):
+        return np.asarray(abs(matrix).sum(axis=1)).ravel()
+
+    return np.concatenate([np.abs(matrix[i:i + block]).sum(axis=1) for i in range(0, matrix.shape[0], block)])
+
+def is_diagonally(matrix) -> bool:
     """
     Checks if a matrix is strictly diagonally dominant.
     
@@ -8,122 +43,811 @@ def is_diagonally(matrix: np.ndarray) -> bool:
     of the diagonal element is greater than the sum of absolute values of other elements in that row.
     
     Args:
-        matrix: Square numpy array representing the matrix
+        matrix: Square numpy array or SciPy sparse matrix
         
     Returns:
         bool: True if matrix is diagonally dominant, False otherwise
     """
-    n = len(matrix)
+    diagonal = abs(matrix.diagonal())
 
-    for i in range(n):
-        # Calculate sum of absolute values of non-diagonal elements in current row
-        row_sum = sum(abs(matrix[i][j]) for j in range(n) if j != i)
+    # |a_ii| > sum of the other elements of the row  <=>  2|a_ii| > sum of the whole row
+    return bool(np.all(2 * diagonal > absolute_row_sums(matrix)))
 
-        # Check diagonal dominance condition
-        if abs(matrix[i][i]) <= row_sum:
-            return False
-        
-    return True
+
+def diagonal_permutation(matrix) -> np.ndarray:
+    """
+    Finds the order of rows that makes the matrix diagonally dominant.
+
+    Row i can stand in position j only if 2|a_ij| > sum of the whole row i, and at most one
+    column of a row (its largest element) can satisfy this. So the bipartite graph rows–columns
+    of the strict dominance has at most one edge per row, and a perfect matching exists exactly
+    when these columns are all different: this is checked in O(n^2) without any search.
+
+    If no such order exists, the rows are assigned to the columns by the assignment problem
+    (Hungarian algorithm) maximizing the product of the dominance margins |a_ij| / sum of row i,
+    which keeps zeros off the diagonal whenever possible. For a sparse matrix only the
+    non-zero elements are candidates, so the matching works on the sparsity pattern.
+
+    Args:
+        matrix: Square numpy array or SciPy sparse matrix
+
+    Returns:
+        np.ndarray: Permutation p, the rearranged matrix is matrix[p]
+    """
+    abs_matrix = abs(matrix)
+    row_sums = absolute_row_sums(matrix)
+    n = matrix.shape[0]
+
+    columns = np.asarray(abs_matrix.argmax(axis=1)).ravel()
+    dominant = 2 * np.asarray(abs_matrix[np.arange(n), columns]).ravel() > row_sums
+
+    if dominant.all() and len(np.unique(columns)) == n:
+        permutation = np.empty(n, dtype=int)
+        permutation[columns] = np.arange(n)
+
+        return permutation
+
+    if sparse.issparse(matrix):
+        return _sparse_diagonal_permutation(sparse.csr_array(abs_matrix), row_sums)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cost = -np.log(abs_matrix / row_sums[:, None])
+
+    # Zero elements are allowed on the diagonal only if there is no other choice
+    cost = np.nan_to_num(cost, nan=1e6, posinf=1e6)
+    rows, columns = linear_sum_assignment(cost)
+
+    permutation = np.empty(n, dtype=int)
+    permutation[columns] = rows
+
+    return permutation
+
+
+def _sparse_diagonal_permutation(abs_matrix, row_sums: np.ndarray) -> np.ndarray:
+    """Assignment of rows to columns over the non-zero elements only (see diagonal_permutation)"""
+    abs_matrix.eliminate_zeros()
+    n = abs_matrix.shape[0]
+
+    # Costs are shifted by 1: a zero weight would mean a missing edge
+    rows = np.repeat(np.arange(n), np.diff(abs_matrix.indptr))
+    cost = abs_matrix.copy()
+    cost.data = 1 - np.log(abs_matrix.data / row_sums[rows])
+
+    try:
+        rows, columns = min_weight_full_bipartite_matching(cost)
+    except ValueError:
+        # Some column has zeros in every row, no order can help
+        return np.arange(n)
+
+    permutation = np.empty(n, dtype=int)
+    permutation[columns] = rows
+
+    return permutation
+
+
+def is_symmetric(matrix, rtol: float = 1e-10, block: int = 1024) -> bool:
+    """
+    Checks if a square matrix is symmetric up to rounding: max |a_ij - a_ji| <= rtol * max |a_ij|.
+
+    A dense matrix is compared by blocks of rows, so no transposed copy of the whole
+    matrix is made (it may be a large memory-mapped one).
+    """
+    if sparse.issparse(matrix):
+        difference = abs(matrix - matrix.T).max()
+        scale = abs(matrix).max()
+    else:
+        n = matrix.shape[0]
+        difference = max(np.abs(matrix[i:i + block] - matrix[:, i:i + block].T).max() for i in range(0, n, block))
+        scale = max(np.abs(matrix[i:i + block]).max() for i in range(0, n, block))
+
+    return bool(difference <= rtol * scale)
 
 
-def rearrange_for_diagonal(matrix: np.ndarray) -> np.ndarray:
+def rearrange_for_diagonal(matrix):
     """
     Attempts to rearrange matrix rows to achieve diagonal dominance.
     
-    For each row, finds the row with maximum absolute value in the current column
-    and swaps rows if necessary to put larger values on the diagonal.
+    The order of rows is found by diagonal_permutation.
     
     Args:
-        matrix: Square numpy array representing the matrix
+        matrix: Square numpy array or SciPy sparse matrix
         
     Returns:
-        np.ndarray: Rearranged matrix (may or may not be diagonally dominant)
+        Rearranged matrix (may or may not be diagonally dominant)
+    """
+    return matrix[diagonal_permutation(matrix)]
+
+
+def jacobi_sweep(A: np.ndarray, B: np.ndarray):
+    """
+    Builds one Jacobi iteration x <- D^-1 (B - R x) in matrix form.
+
+    With R = A - D the step is written as x + (B - A x) / D, so an iteration is a single
+    matrix-vector product and needs neither R nor a loop over the rows.
+
+    Args:
+        A: Square coefficient matrix with a non-zero diagonal
+        B: Constants vector
+
+    Returns:
+        function: x -> next approximation
     """
-    n = len(matrix)
+    D = A.diagonal()
+
+    return lambda x: x + (B - A @ x) / D
+
+
+def sor_sweep(A: np.ndarray, B: np.ndarray, omega: float = 1.0):
+    """
+    Builds one successive over-relaxation (SOR) iteration, omega = 1 gives Gauss–Seidel.
+
+    The rows are updated in place, so every row already uses the new values of the previous ones.
+    For a sparse matrix the same iteration is one sparse triangular solve:
+    (D + omega L) x_new = omega B - (omega U + (omega - 1) D) x.
+
+    Args:
+        A: Square coefficient matrix with a non-zero diagonal
+        B: Constants vector
+        omega: Relaxation factor in (0, 2)
+
+    Returns:
+        function: x -> next approximation
+    """
+    D = A.diagonal()
+    n = len(B)
+
+    if sparse.issparse(A):
+        lower = (sparse.diags_array(D) + omega * sparse.tril(A, -1)).tocsr()
+        upper = (omega * sparse.triu(A, 1) + (omega - 1) * sparse.diags_array(D)).tocsr()
+
+        return lambda x: spsolve_triangular(lower, omega * B - upper @ x, lower=True)
+
+    def sweep(x):
+        x = x.copy()
+
+        for i in range(n):
+            x[i] += omega * (B[i] - A[i] @ x) / D[i]
+
+        return x
+
+    return sweep
+
+
+def _block_jacobi_worker(names: dict, n: int, start: int, stop: int, barrier) -> None:
+    """
+    Worker of parallel_jacobi_sweep: on every sweep updates x[start:stop] in the next buffer
+    from the current one, until the stop flag is set.
+    """
+    memory = {key: shared_memory.SharedMemory(name=name) for key, name in names.items()}
+
+    A = np.ndarray((n, n), dtype=float, buffer=memory["A"].buf)[start:stop]
+    B = np.ndarray((n,), dtype=float, buffer=memory["B"].buf)[start:stop]
+    x = np.ndarray((2, n), dtype=float, buffer=memory["x"].buf)
+    control = np.ndarray((2,), dtype=np.int64, buffer=memory["control"].buf)
+
+    D = A[np.arange(stop - start), np.arange(start, stop)]
 
-    for i in range(n):
-        # Find row with maximum absolute value in current column (from current row downwards)
-        max_row = max(range(i, n), key=lambda r: abs(matrix[r][i]))
+    try:
+        while True:
+            barrier.wait()
 
-        # Swap current row with max_row if different
-        if i != max_row:
-            matrix[i], matrix[max_row] = matrix[max_row], matrix[i]
+            # control = [stop flag, index of the buffer with the current approximation]
+            if control[0]:
+                break
 
-    return matrix
+            current = control[1]
+            x[1 - current, start:stop] = x[current, start:stop] + (B - A @ x[current]) / D
 
+            barrier.wait()
 
-def find_system_of_linear_equations_roots(matrix: list, accuracy: float) -> str:
+    except BrokenBarrierError:
+        pass
+    except Exception:
+        barrier.abort()
+        raise
+    finally:
+        del A, B, x, control
+        for block in memory.values():
+            block.close()
+
+
+@contextmanager
+def parallel_jacobi_sweep(A: np.ndarray, B: np.ndarray, workers: int = None):
+    """
+    Builds one Jacobi iteration computed by several processes (block Jacobi over rows).
+
+    A, B and two buffers for x are placed in shared memory once. Every worker process owns
+    a block of rows and on each sweep reads the current buffer and writes its block of the
+    next one, so no locks are needed: the sweep is two barriers, start and finish. Every
+    worker reads only its rows of A, so the memory bandwidth of all cores is used.
+    A worker that dies before the stop (killed by a signal or out of memory) never reaches
+    the barrier, so a watcher thread aborts it and the sweep raises BrokenBarrierError.
+
+    Usage example:
+    >>> with parallel_jacobi_sweep(A, B, workers=4) as sweep:
+    ...     x, errors, status = stationary_iterations(sweep, len(B), accuracy)
+
+    Args:
+        A: Dense square coefficient matrix with a non-zero diagonal
+        B: Constants vector
+        workers: Number of processes, None uses all the cores
+
+    Yields:
+        function: x -> next approximation (the same iteration as jacobi_sweep)
+    """
+    n = len(B)
+    workers = max(1, min(workers or os.cpu_count() or 1, n))
+
+    sizes = {"A": A.shape[0] * A.shape[1] * 8, "B": n * 8, "x": 2 * n * 8, "control": 2 * 8}
+    memory = {key: shared_memory.SharedMemory(create=True, size=size) for key, size in sizes.items()}
+
+    shared_A = np.ndarray((n, n), dtype=float, buffer=memory["A"].buf)
+    shared_x = np.ndarray((2, n), dtype=float, buffer=memory["x"].buf)
+    control = np.ndarray((2,), dtype=np.int64, buffer=memory["control"].buf)
+
+    shared_A[:] = A
+    np.ndarray((n,), dtype=float, buffer=memory["B"].buf)[:] = B
+    control[:] = 0
+
+    # The parent process takes part in the barriers to start and collect every sweep
+    barrier = multiprocessing.Barrier(workers + 1)
+    bounds = np.linspace(0, n, workers + 1).astype(int)
+    names = {key: block.name for key, block in memory.items()}
+
+    processes = [multiprocessing.Process(target=_block_jacobi_worker, args=(names, n, bounds[i], bounds[i + 1], barrier), daemon=True)
+                 for i in range(workers)]
+
+    for process in processes:
+        process.start()
+
+    def watch():
+        wait([process.sentinel for process in processes])
+
+        if not control[0]:
+            barrier.abort()
+
+    watcher = Thread(target=watch, daemon=True)
+    watcher.start()
+
+    def sweep(x):
+        current = control[1]
+        shared_x[current] = x
+
+        barrier.wait()
+        barrier.wait()
+
+        control[1] = 1 - current
+
+        return shared_x[1 - current].copy()
+
+    try:
+        yield sweep
+
+        control[0] = 1
+        barrier.wait()
+    finally:
+        barrier.abort()
+
+        for process in processes:
+            process.join()
+
+        watcher.join()
+
+        del shared_A, shared_x, control
+        for block in memory.values():
+            block.close()
+            block.unlink()
+
+
+def estimate_spectral_radius(step, n: int, max_steps: int = 12, rtol: float = 1e-2) -> float:
+    """
+    Estimates the spectral radius of the iteration matrix T by power iteration.
+
+    Every step costs as much as an iteration of the method, so the power iteration stops
+    as soon as two consecutive growth ratios ||T v|| / ||v|| agree within rtol (within
+    rtol * 0.1 for small ratios: they only mean a fast convergence for the forecast).
+
+    Args:
+        step: Function applying T to a vector (an iteration with zero constants vector)
+        n: Size of the system
+        max_steps: Maximum number of power-iteration steps
+        rtol: Relative tolerance for the growth ratio to be considered settled
+
+    Returns:
+        float: The settled growth ratio, or the geometric mean of the ratios over the second
+               half of the steps if they keep oscillating (complex dominant eigenvalues)
+    """
+    v = np.random.default_rng(0).uniform(-1, 1, n)
+    v /= np.linalg.norm(v)
+
+    growth = []
+
+    for _ in range(max_steps):
+        v = step(v)
+        norm = np.linalg.norm(v)
+
+        if norm == 0 or not np.isfinite(norm):
+            return 0.0 if norm == 0 else float("inf")
+
+        v /= norm
+
+        if growth and abs(norm - growth[-1]) <= rtol * max(norm, 0.1):
+            return float(norm)
+
+        growth.append(norm)
+
+    return float(np.exp(np.mean(np.log(growth[max_steps // 2:]))))
+
+
+def jacobi_bound(A) -> float:
+    """
+    Returns ||T||_inf = max_i sum_(j != i) |a_ij| / |a_ii| of the Jacobi iteration matrix T.
+
+    It bounds the spectral radius of the Jacobi iteration matrix and is below 1 exactly
+    for a diagonally dominant matrix. Costs one pass over the rows.
+    """
+    diagonal = abs(A.diagonal())
+
+    return float(np.max((absolute_row_sums(A) - diagonal) / diagonal))
+
+
+def optimal_relaxation(A: np.ndarray, rho: float = None) -> float:
+    """
+    Chooses the SOR relaxation factor from the estimated spectral radius rho of the Jacobi
+    iteration matrix: omega = 2 / (1 + sqrt(1 - rho^2)) (Young's formula).
+    rho is estimated by power iteration unless it is already known.
+    Falls back to Gauss–Seidel (omega = 1) if the Jacobi iterations do not contract.
+    """
+    if rho is None:
+        n = A.shape[0]
+        rho = estimate_spectral_radius(jacobi_sweep(A, np.zeros(n)), n)
+
+    if rho >= 1:
+        return 1.0
+
+    return 2 / (1 + np.sqrt(1 - rho**2))
+
+
+def method_sweep(A: np.ndarray, B: np.ndarray, method: str, omega: float = 1.0):
+    """
+    Builds one iteration of the method: "jacobi", "gauss_seidel" or "sor" (with relaxation omega).
+    For "block_jacobi" this is the same iteration computed serially (see parallel_jacobi_sweep).
+
+    Raises:
+        NameError: If the method is unknown
+    """
+    if method in ("jacobi", "block_jacobi"):
+        return jacobi_sweep(A, B)
+    elif method == "gauss_seidel":
+        return sor_sweep(A, B)
+    elif method == "sor":
+        return sor_sweep(A, B, omega)
+    else:
+        raise NameError
+
+
+def forecast_convergence(A: np.ndarray, B: np.ndarray, accuracy: float, method: str = "jacobi", omega: float = 1.0, rho: float = None) -> tuple:
+    """
+    Estimates the spectral radius of the iteration matrix of the method and predicts
+    the number of iterations before any of them is run.
+
+    The iteration matrix is applied as the iteration with a zero constants vector, so the
+    same estimate works for every method (see estimate_spectral_radius). Starting from
+    x0 = 0 the differences between iterations shrink about rho times per iteration:
+    ||x_k+1 - x_k|| ~ rho^k ||x_1||, which gives the forecast for the requested accuracy.
+
+    Args:
+        A: Square coefficient matrix with a non-zero diagonal
+        B: Constants vector
+        accuracy: Desired accuracy threshold for stopping iterations
+        method: "jacobi", "gauss_seidel" or "sor"
+        omega: Relaxation factor for SOR
+        rho: Already known estimate (or bound) of the spectral radius, then no power
+             iteration is run
+
+    Returns:
+        tuple: (spectral radius estimate, predicted number of iterations or None if rho >= 1)
+    """
+    n = len(B)
+
+    if rho is None:
+        rho = estimate_spectral_radius(method_sweep(A, np.zeros(n), method, omega), n)
+
+    if rho >= 1:
+        return rho, None
+
+    # The first Jacobi iteration from zero is B / D, no sweep is needed for it
+    if method in ("jacobi", "block_jacobi"):
+        first_error = np.linalg.norm(B / A.diagonal(), np.inf)
+    else:
+        first_error = np.linalg.norm(method_sweep(A, B, method, omega)(np.zeros(n)), np.inf)
+
+    if first_error < accuracy or rho == 0:
+        return rho, 1
+
+    return rho, 1 + max(0, math.ceil(math.log(accuracy / first_error) / math.log(rho)))
+
+
+def stationary_iterations(sweep, n: int, accuracy: float, max_iter: int = 10000, divergence_patience: int = 10) -> tuple:
+    """
+    Runs the iterations x <- sweep(x) from the zero vector.
+
+    Args:
+        sweep: Function computing the next approximation (see jacobi_sweep, sor_sweep)
+        n: Size of the system
+        accuracy: Desired accuracy threshold for stopping iterations
+        max_iter: Maximum number of iterations
+        divergence_patience: Number of consecutive iterations with a growing error
+                             after which the process is treated as divergent
+
+    Returns:
+        tuple: (solution vector, list of errors per iteration, status), where status is None
+               on success or the key of the warning message
+               ("divergence_warning_message" / "max_iter_warning_message")
+    """
+    x = np.zeros(n)
+    errors = []
+    growing = 0
+
+    for _ in range(max_iter):
+        x_new = sweep(x)
+
+        # Calculate maximum error between iterations
+        error = float(np.linalg.norm(x_new - x, np.inf))
+        growing = growing + 1 if errors and error > errors[-1] else 0
+        errors.append(error)
+
+        x = x_new
+
+        # Stop if desired accuracy achieved
+        if error < accuracy:
+            return x, errors, None
+
+        if not np.isfinite(error) or growing >= divergence_patience:
+            return x, errors, "divergence_warning_message"
+
+    return x, errors, "max_iter_warning_message"
+
+
+def conjugate_gradient(A: np.ndarray, B: np.ndarray, accuracy: float, max_iter: int = 10000, preconditioned: bool = True) -> tuple:
+    """
+    Solves a system with a symmetric positive definite matrix by the conjugate gradient method.
+
+    With preconditioned=True the Jacobi preconditioner M = diag(A) is used (requires a positive
+    diagonal): it costs one division per element and evens out the scale of the rows.
+    In exact arithmetic the method finishes in at most n iterations, in practice the number of
+    iterations grows with the square root of the condition number of M^-1 A.
+
+    Args:
+        A: Symmetric positive definite matrix (NumPy array or SciPy sparse matrix)
+        B: Constants vector
+        accuracy: The iterations stop when the residual ||B - Ax|| (max norm) is below it
+        max_iter: Maximum number of iterations
+        preconditioned: Whether to use the Jacobi preconditioner
+
+    Returns:
+        tuple: (solution vector, list of residuals per iteration, status), where status is None
+               on success or the key of the warning message: "cg_breakdown_warning_message"
+               if p^T A p <= 0 (the matrix is not positive definite), "max_iter_warning_message"
+    """
+    n = len(B)
+    inverse_diagonal = 1 / A.diagonal() if preconditioned else np.ones(n)
+
+    x = np.zeros(n)
+    r = B.copy()
+    residuals = []
+
+    if np.linalg.norm(r, np.inf) < accuracy:
+        return x, residuals, None
+
+    z = inverse_diagonal * r
+    p = z.copy()
+    rz = r @ z
+
+    for _ in range(max_iter):
+        Ap = A @ p
+        curvature = p @ Ap
+
+        if not curvature > 0:
+            return x, residuals, "cg_breakdown_warning_message"
+
+        alpha = rz / curvature
+        x = x + alpha * p
+        r = r - alpha * Ap
+
+        residual = float(np.linalg.norm(r, np.inf))
+        residuals.append(residual)
+
+        if residual < accuracy:
+            return x, residuals, None
+
+        z = inverse_diagonal * r
+        rz, rz_previous = r @ z, rz
+        p = z + (rz / rz_previous) * p
+
+    return x, residuals, "max_iter_warning_message"
+
+
+def solve_stationary(A: np.ndarray, B: np.ndarray, accuracy: float, method: str = "jacobi", max_iter: int = 10000, notify=None, workers: int = None) -> tuple:
+    """
+    Solves the system by Jacobi, Gauss–Seidel or SOR iterations.
+    "block_jacobi" runs the Jacobi iterations of a dense matrix in workers processes
+    (see parallel_jacobi_sweep), for a sparse one it is the usual Jacobi method.
+
+    First attempts to make the matrix diagonally dominant for better convergence. A matrix
+    that is not diagonally dominant is still accepted if the estimated spectral radius of
+    the iteration matrix is below 1 (see forecast_convergence).
+    For SOR the relaxation factor is chosen automatically (see optimal_relaxation).
+    The forecast costs a few sweeps (the power iteration stops once the estimate settles);
+    SOR reuses the Jacobi estimate for it (omega - 1 for a diagonally dominant matrix) and
+    the parallel Jacobi method uses the bound of jacobi_bound, which needs no sweeps.
+
+    Returns:
+        tuple: (solution vector, list of errors per iteration, status), where status is None
+               on success or the key of the warning message
+    """
+    dominant = is_diagonally(A)
+
+    # Try to make matrix diagonally dominant, the equations are reordered together with B
+    if not dominant:
+        permutation = diagonal_permutation(A)
+        A, B = A[permutation], B[permutation]
+        dominant = is_diagonally(A)
+
+    if not np.all(A.diagonal()):
+        return None, [], "non_diag_matrix_warning_message"
+
+    omega, rho = 1.0, None
+
+    if method == "sor":
+        # One power iteration of Jacobi gives both omega and, by Young's theory,
+        # the spectral radius omega - 1 of the SOR iteration
+        rho_jacobi = estimate_spectral_radius(jacobi_sweep(A, np.zeros(len(B))), len(B))
+        omega = optimal_relaxation(A, rho_jacobi)
+
+        if dominant and rho_jacobi < 1:
+            rho = float(omega - 1)
+    elif dominant and method == "block_jacobi":
+        # Convergence is guaranteed and the power iteration would run serially in this process,
+        # so the forecast uses the bound instead
+        rho = jacobi_bound(A)
+
+    rho, predicted = forecast_convergence(A, B, accuracy, method, omega, rho)
+
+    if notify is not None:
+        notify(rho, predicted)
+
+    # Diagonal dominance guarantees convergence, otherwise the spectral radius decides
+    if not dominant and predicted is None:
+        return None, [], "spectral_radius_warning_message"
+
+    if method == "block_jacobi" and not sparse.issparse(A):
+        try:
+            with parallel_jacobi_sweep(A, B, workers) as sweep:
+                return stationary_iterations(sweep, len(B), accuracy, max_iter)
+        except BrokenBarrierError:
+            # A worker process has failed or died
+            return None, [], "worker_failure_warning_message"
+
+    sweep = method_sweep(A, B, method, omega)
+
+    return stationary_iterations(sweep, len(B), accuracy, max_iter)
+
+
+def matrix_hash(A, block: int = 1024) -> str:
+    """
+    Hashes the values and the shape of a matrix. A dense matrix is hashed by blocks of rows,
+    so a large memory-mapped one is not copied; a sparse one by its canonical CSR arrays.
+    """
+    digest = hashlib.sha256(str(A.shape).encode())
+
+    if sparse.issparse(A):
+        A = sparse.csr_array(A)
+        A.sum_duplicates()
+
+        for array in (A.indptr, A.indices, A.data):
+            digest.update(np.ascontiguousarray(array).tobytes())
+    else:
+        for i in range(0, A.shape[0], block):
+            digest.update(np.ascontiguousarray(A[i:i + block], dtype=float).tobytes())
+
+    return digest.hexdigest()
+
+
+def direct_method_cost(A) -> tuple:
+    """
+    Estimates the cost of the LU factorization before running it.
+
+    A dense matrix takes 2/3 n^3 operations and n^2 entries. The fill-in of a sparse one
+    is bounded by its bandwidth b after the reverse Cuthill–McKee ordering: the factors
+    of a band matrix stay in the band (3b with pivoting), so about n b^2 operations and
+    3 n b entries. The estimate costs O(nnz) and is pessimistic for SuperLU's own ordering.
+
+    Returns:
+        tuple: (operations, entries of the factors)
+    """
+    n = A.shape[0]
+
+    if not sparse.issparse(A):
+        return 2 / 3 * n**3, n**2
+
+    A = sparse.csr_matrix(A)
+    order = reverse_cuthill_mckee(A, symmetric_mode=False)
+    reordered = A[order][:, order].tocoo()
+    bandwidth = int(np.abs(reordered.row - reordered.col).max(initial=0))
+
+    return n * (bandwidth + 1)**2, n * (3 * bandwidth + 1)
+
+
+def direct_method_feasible(A) -> bool:
+    """Checks that the LU factorization fits into DIRECT_MAX_OPERATIONS and DIRECT_MAX_ENTRIES"""
+    operations, entries = direct_method_cost(A)
+
+    return operations <= DIRECT_MAX_OPERATIONS and entries <= DIRECT_MAX_ENTRIES
+
+
+def lu_solver(A) -> tuple:
+    """
+    Returns the function solving A x = B by the LU factorization of A.
+
+    The factorization takes O(n^3) operations for a dense matrix, but then every
+    right-hand side is solved in O(n^2), so the factorizations of the last matrices
+    are kept in an LRU cache keyed by matrix_hash, FACTORIZATION_CACHE_BYTES in total.
+    A sparse matrix is factored by SuperLU.
+
+    Returns:
+        tuple: (solve function or None if the matrix is singular, whether it was taken from the cache)
+    """
+    key = matrix_hash(A)
+
+    if key in _factorizations:
+        _factorizations.move_to_end(key)
+
+        return _factorizations[key][0], True
+
+    if sparse.issparse(A):
+        try:
+            factorization = splu(sparse.csc_array(A))
+        except RuntimeError:
+            return None, False
+
+        solve = factorization.solve
+        size = sum(array.nbytes for factor in (factorization.L, factorization.U)
+                   for array in (factor.data, factor.indices, factor.indptr))
+        size += factorization.perm_r.nbytes + factorization.perm_c.nbytes
+    else:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", LinAlgWarning)
+            factorization = lu_factor(A)
+
+        if not np.all(factorization[0].diagonal()):
+            return None, False
+
+        solve = lambda B: lu_solve(factorization, B)
+        size = factorization[0].nbytes + factorization[1].nbytes
+
+    # A factorization larger than the whole cache is used once and not kept
+    if size <= FACTORIZATION_CACHE_BYTES:
+        _factorizations[key] = (solve, size)
+
+        while sum(size for _, size in _factorizations.values()) > FACTORIZATION_CACHE_BYTES:
+            _factorizations.popitem(last=False)
+
+    return solve, False
+
+
+def format_solution(A: np.ndarray, x: np.ndarray, errors: list, errors_title: str = "Вектор погрешностей", iterations: int = None) -> str:
+    """Formats the solution as the HTML-like output of find_system_of_linear_equations_roots"""
+    if iterations is None:
+        iterations = len(errors)
+
+    errors_output = "".join(str(error) + "\n" for error in errors)
+
+    # Calculate matrix norm (infinity norm)
+    norm_A = absolute_row_sums(A).max()
+
+    # Format output string with results
+    output = f"<b>Calculation results:</b>\n\n🔸 <i>Норма матрицы:</i> {norm_A}\n\n<i>🔸 Вектор неизвестных:</i>\n<pre>{x}</pre>\n\n<i>🔸 Количество итераций:</i> {iterations}\n\n<i>🔸 {errors_title}:</i>\n<pre>{errors_output}</pre>"
+
+    return output
+
+
+def solve_direct(A, B, too_large_status: str = "direct_size_warning_message") -> str:
+    """
+    Solves the system by the LU factorization (see lu_solver), returns the output or the warning key.
+    A system beyond the limits of direct_method_feasible is not factored, too_large_status is returned.
+    """
+    if not direct_method_feasible(A):
+        return too_large_status
+
+    solve, cached = lu_solver(A)
+
+    if solve is None:
+        return "singular_matrix_warning_message"
+
+    x = solve(B)
+    residual = float(np.linalg.norm(B - A @ x, np.inf))
+    title = "Невязка (LU-разложение из кэша)" if cached else "Невязка (LU-разложение)"
+
+    return format_solution(A, x, [residual], title, iterations=0)
+
+
+def find_system_of_linear_equations_roots(matrix: list, accuracy: float, method: str = "auto", max_iter: int = 10000, notify=None, workers: int = None) -> str:
     """
     Solves system of linear equations using iterative method with given accuracy.
     
-    Implements Jacobi iteration method for solving linear systems. First attempts to make
-    the matrix diagonally dominant for better convergence.
+    Implements Jacobi, Gauss–Seidel, SOR (see solve_stationary) and conjugate gradient
+    (see conjugate_gradient) methods for solving linear systems, and the direct method "lu"
+    that reuses the factorization of a matrix already seen (see lu_solver). The direct method
+    is also used when the iterations cannot converge for the matrix, if the system is small
+    enough to factor (see direct_method_feasible).
+    With method="auto" the conjugate gradient method is chosen for a symmetric matrix with
+    a positive diagonal, if it breaks down (the matrix is not positive definite) or the matrix
+    is not symmetric, the Jacobi method is used.
+    A sparse system stays sparse all the way, so memory and the cost of an iteration
+    grow with the number of non-zero elements.
     
     Args:
         matrix: Augmented matrix of the system [A|B] where each row contains coefficients
-               followed by the constant term
+               followed by the constant term: a list of rows, a NumPy array (also a
+               memory-mapped one, see tools.load_binary_matrix) or a SciPy sparse
+               matrix (see tools.parse_sparse_matrix)
         accuracy: Desired accuracy threshold for stopping iterations
+        method: "auto", "jacobi", "block_jacobi", "gauss_seidel", "sor", "cg" or "lu"
+        max_iter: Maximum number of iterations
+        notify: Optional function called with (spectral radius estimate, predicted iterations)
+                before the Jacobi, Gauss–Seidel or SOR iterations start
+        workers: Number of processes for "block_jacobi", None uses all the cores
         
     Returns:
         str: Formatted string with HTML-like tags containing:
              - Matrix norm
              - Solution vector
              - Iteration count
-             - Error progression
-             Or warning message if matrix cannot be made diagonally dominant
+             - Error progression (residuals for the conjugate gradient and LU methods)
+             Or warning message key if the matrix is singular or too large to factor,
+             the iterations cannot converge, diverge, break down or do not reach
+             the accuracy in max_iter iterations
     """
-    n = len(matrix)
-
     # Split matrix into coefficient matrix A and constants vector B
-    A = np.array([row[:-1] for row in matrix], dtype=float)
-    B = np.array([row[-1] for row in matrix], dtype=float)
+    if sparse.issparse(matrix):
+        matrix = sparse.csr_array(matrix, dtype=float)
+        A = matrix[:, :-1].tocsr()
+        B = matrix[:, [-1]].toarray().ravel()
+    else:
+        # An array (e.g. a memory-mapped binary matrix) is used as is, without copying
+        matrix = np.asarray(matrix, dtype=float)
+        A = matrix[:, :-1]
+        B = matrix[:, -1]
     
-    # Try to make matrix diagonally dominant
-    if not is_diagonally(A):
-        A = rearrange_for_diagonal(A)
+    if method == "lu":
+        return solve_direct(A, B)
 
-        # If still not diagonally dominant, return warning
-        if not is_diagonally(A):
-            return "non_diag_matrix_warning_message"
-    
-    # Initialize solution vector with zeros
-    x = np.zeros(n)
+    automatic = method == "auto"
 
-    iterations = 0
-    errors = []
-    errors_output = ""
-    
-    # Iterative process
-    while True:
-        x_new = np.zeros(n)
+    if automatic:
+        method = "cg" if np.all(A.diagonal() > 0) and is_symmetric(A) else "jacobi"
 
-        # Jacobi iteration: compute each component of new approximation
-        for i in range(n):
-            # Sum of products of known elements before current diagonal
-            s1 = np.dot(A[i, :i], x[:i])
-            # Sum of products of known elements after current diagonal
-            s2 = np.dot(A[i, i+1:], x[i+1:])
+    if method == "cg":
+        x, residuals, status = conjugate_gradient(A, B, accuracy, max_iter, preconditioned=np.all(A.diagonal() > 0))
 
-            # Compute new value for current variable
-            x_new[i] = (B[i] - s1 - s2) / A[i, i]
-        
-        # Calculate maximum error between iterations
-        error = np.linalg.norm(x_new - x, np.inf)
-        errors_output += str(float(error))+"\n" 
-        errors.append(str(float(error))+"\n")
+        if status is None:
+            return format_solution(A, x, residuals, "Вектор невязок")
 
-        iterations += 1
-        
-        # Stop if desired accuracy achieved
-        if error < accuracy:
-            break
-        
-        x = x_new
+        # A breakdown in the automatic mode only means that the matrix is not positive definite
+        if not (automatic and status == "cg_breakdown_warning_message"):
+            return status
 
-    # Calculate matrix norm (infinity norm)
-    norm_A = np.linalg.norm(A, np.inf)
+        method = "jacobi"
 
-    # Format output string with results
-    output = f"<b>Calculation results:</b>\n\n🔸 <i>Норма матрицы:</i> {norm_A}\n\n<i>🔸 Вектор неизвестных:</i>\n<pre>{x_new}</pre>\n\n<i>🔸 Количество итераций:</i> {iterations}\n\n<i>🔸 Вектор погрешностей:</i>\n<pre>{errors_output}</pre>"
+    x, errors, status = solve_stationary(A, B, accuracy, method, max_iter, notify, workers)
 
-    return output
+    # The matrix was rejected before the iterations: there is nothing to wait for, solve directly
+    # if the factorization is affordable, otherwise the rejection stands
+    if status in ("non_diag_matrix_warning_message", "spectral_radius_warning_message"):
+        return solve_direct(A, B, too_large_status=status)
+
+    if status is not None:
+        return status
+
+    return format_solution(A, x, errors)
@@ -1,94 +1,325 @@
 import math
 import numpy as np
-from .tools import parse_equations
+from .tools import parse_system
+from .expressions import compile_expression
 
 
-def bisection_method(equation: str, a: float, b: float, accuracy: float, bisection_counter : int = 0) -> tuple[float, float, int]:
+class CountedFunction:
+    """
+    Wraps a compiled equation and counts its evaluations, so every solver of this module
+    reports the cost in the same way. A call on a NumPy array counts one evaluation per element.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.evaluations = 0
+
+    def __call__(self, x):
+        self.evaluations += np.size(x)
+        return self.f(x)
+
+
+def counted_expression(equation: str, backend: str = 'math') -> CountedFunction:
+    """Compiles the equation (see compile_expression) and wraps it into a fresh CountedFunction"""
+    return CountedFunction(compile_expression(equation, backend=backend))
+
+
+def bisection_method(equation: str, a: float, b: float, accuracy: float, max_iter: int = 100) -> tuple[float, float, int, int]:
     """
     Finds a root of a given equation within a specified interval using the Bisection Method.
 
-    The function recursively narrows down the interval [a, b] until the desired accuracy is achieved.
-    It evaluates the equation at the midpoint and checks the sign change to determine the subinterval containing the root.
+    The function narrows down the interval [a, b] in a loop until the desired accuracy is achieved.
+    It evaluates the equation at the midpoint and checks the sign change against the value at the
+    left endpoint, which is carried forward, so every bisection costs exactly one evaluation.
 
     Args:
         equation (str): A mathematical equation in terms of 'x' (e.g., "x**2 - 2").
         a (float): The left endpoint of the initial interval.
         b (float): The right endpoint of the initial interval.
         accuracy (float): The desired accuracy (tolerance) for the root approximation.
-        bisection_counter (int, optional): Counter for the number of bisections performed. Defaults to 0.
+        max_iter (int, optional): Maximum number of bisections. Defaults to 100.
 
     Returns:
-        tuple[float, float, int]: A tuple containing:
+        tuple[float, float, int, int]: A tuple containing:
             - The approximate root (x).
             - The value of the equation at the root (f(x)).
             - The total number of bisections performed.
-
-    Raises:
-        ValueError: If the initial interval [a, b] does not satisfy f(a) * f(b) < 0 (no root in the interval).
+            - The total number of evaluations of the equation.
+        (None, None, max_iter, evaluations) if the accuracy was not reached in max_iter bisections.
 
     Example:
         >>> bisection_method("x**2 - 2", 1.0, 2.0, 0.001)
-        (1.4140625, -0.00042724609375, 10)
+        (1.41455078125, 0.0009539127349853516, 10, 12)
     """
 
-    while math.fabs(b - a) > accuracy:
+    f = counted_expression(equation)
+
+    f_a = f(a)
+
+    for bisection_counter in range(max_iter + 1):
+        if math.fabs(b - a) <= accuracy:
+            x = (a + b) / 2
+
+            return (x, f(x), bisection_counter, f.evaluations)
+
+        if bisection_counter == max_iter:
+            break
+
         mid = (a + b) / 2
-        
-        if eval(equation, {"x": mid}) * eval(equation, {"x": a}) > 0:
-            bisection_counter += 1
-            return bisection_method(equation, mid, b, accuracy, bisection_counter)
+        f_mid = f(mid)
+
+        if f_mid * f_a > 0:
+            a, f_a = mid, f_mid
+        else:
+            b = mid
+
+    print(f"Не сошлось за {max_iter} итераций.")
+
+    return None, None, max_iter, f.evaluations
+
+
+def brent_method(equation: str, a: float, b: float, accuracy: float, max_iter: int = 100) -> tuple[float, float, int, int]:
+    """
+    Finds a root of a given equation within a specified interval using Brent's Method.
+
+    Every step tries inverse quadratic interpolation (or the secant step when only two points
+    are distinct) and falls back to bisection whenever the interpolated point is not trusted,
+    so the root always stays bracketed while the convergence is close to the secant speed.
+
+    Args:
+        equation (str): A mathematical equation in terms of 'x' (e.g., "x**2 - 2").
+        a (float): The left endpoint of the initial interval.
+        b (float): The right endpoint of the initial interval.
+        accuracy (float): The desired accuracy (tolerance) for the root approximation.
+        max_iter (int, optional): Maximum number of steps. Defaults to 100.
+
+    Returns:
+        tuple[float, float, int, int]: A tuple containing:
+            - The approximate root (x).
+            - The value of the equation at the root (f(x)).
+            - The total number of steps performed.
+            - The total number of evaluations of the equation.
+        (None, None, steps, evaluations) if f(a) * f(b) > 0 or the method did not converge.
+
+    Example:
+        >>> brent_method("x**2 - 2", 1.0, 2.0, 0.001)
+        (1.414071510957324, -0.00040176189887053404, 4, 6)
+    """
+
+    f = counted_expression(equation)
+
+    f_a, f_b = f(a), f(b)
+
+    if f_a * f_b > 0:
+        print("На концах интервала функция должна иметь разные знаки")
+        return None, None, 0, f.evaluations
+
+    # b is the best approximation, c the contrapoint keeping the bracket [b, c], a the previous b
+    c, f_c = a, f_a
+    d = e = b - a
+
+    # If three steps have not shrunk the bracket at least fourfold (two bisections' worth),
+    # the next step is a forced bisection
+    checkpoint = abs(b - a)
+    force_bisection = False
+
+    for iteration in range(max_iter + 1):
+        if f_b * f_c > 0:
+            c, f_c = a, f_a
+            d = e = b - a
+
+        if abs(f_c) < abs(f_b):
+            a, b, c = b, c, b
+            f_a, f_b, f_c = f_b, f_c, f_b
+
+        tol = 2 * np.finfo(float).eps * abs(b) + accuracy / 2
+        m = (c - b) / 2
+
+        if abs(m) <= tol or f_b == 0:
+            return b, f_b, iteration, f.evaluations
+
+        if iteration == max_iter:
+            break
+
+        if iteration % 3 == 0:
+            force_bisection = iteration > 0 and abs(m) > checkpoint / 4
+            checkpoint = abs(m)
+
+        if not force_bisection and abs(e) >= tol and abs(f_a) > abs(f_b):
+            s = f_b / f_a
+
+            if a == c:
+                # Secant step
+                p = 2 * m * s
+                q = 1 - s
+            else:
+                # Inverse quadratic interpolation
+                q = f_a / f_c
+                r = f_b / f_c
+                p = s * (2 * m * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+
+            if p > 0:
+                q = -q
+            else:
+                p = -p
+
+            if 2 * p < min(3 * m * q - abs(tol * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = m
         else:
-            bisection_counter += 1
-            return bisection_method(equation, a, mid, accuracy, bisection_counter)
-        
+            d = e = m
+            force_bisection = False
+
+        a, f_a = b, f_b
+        b += d if abs(d) > tol else math.copysign(tol, m)
+        f_b = f(b)
+
+    print(f"Не сошлось за {max_iter} итераций.")
+
+    return None, None, max_iter, f.evaluations
+
+
+def find_all_roots(equation: str, a: float, b: float, accuracy: float, samples: int = 10000, max_iter: int = 100) -> tuple[np.ndarray, np.ndarray, int, int]:
+    """
+    ### Finds all roots of the equation on [a, b].
+
+    The equation is sampled on a grid of `samples` subintervals in one vectorized pass, every
+    sign change between neighbouring nodes gives a bracket, and all brackets are refined at once
+    by the vectorized Illinois (modified regula falsi) method. Roots of even multiplicity and
+    roots closer to each other than the grid step do not change the sign and are not found.
+
+    #### Parameters:
+    - equation: string like "sin(5*x) - x / 3"
+    - a, b: interval boundaries
+    - accuracy: accuracy
+    - samples: number of grid subintervals (default 10000)
+    - max_iter: maximum number of refinement steps (default 100)
+
+    #### Returns a tuple of values:
+    - sorted array of the roots
+    - values of the function at the roots
+    - number of refinement steps performed
+    - total number of function evaluations
+    """
 
-    x = (a + b) / 2
+    f = counted_expression(equation, backend='numpy')
 
-    return (x, eval(equation, {"x": x}), bisection_counter)
+    x = np.linspace(a, b, samples + 1)
+    with np.errstate(all='ignore'):
+        y = np.broadcast_to(np.asarray(f(x), dtype=float), x.shape)
+
+    exact = y == 0
+    brackets = np.flatnonzero(y[:-1] * y[1:] < 0)
+
+    x_left, x_right = x[brackets], x[brackets + 1]
+    f_left, f_right = y[brackets], y[brackets + 1]
+    # A sign change across a pole is not a root: the value there grows instead of vanishing
+    f_bound = np.maximum(np.abs(f_left), np.abs(f_right))
+
+    x_curr = x_left.copy()
+    side = np.zeros(len(brackets), dtype=int)
+    active = np.ones(len(brackets), dtype=bool)
+
+    iteration = 0
+    while active.any() and iteration < max_iter:
+        iteration += 1
+        idx = np.flatnonzero(active)
+
+        xl, xr, fl, fr = x_left[idx], x_right[idx], f_left[idx], f_right[idx]
+        x_new = xr - fr * (xr - xl) / (fr - fl)
+        with np.errstate(all='ignore'):
+            f_new = np.broadcast_to(np.asarray(f(x_new), dtype=float), x_new.shape)
+
+        # Root between x_new and the right end: move the left end, halve the stale right value
+        # if the left end was also moved on the previous step (and vice versa)
+        to_left = f_new * fl > 0
+        to_right = ~to_left
+
+        x_left[idx[to_left]], f_left[idx[to_left]] = x_new[to_left], f_new[to_left]
+        f_right[idx[to_left & (side[idx] == -1)]] /= 2
+
+        x_right[idx[to_right]], f_right[idx[to_right]] = x_new[to_right], f_new[to_right]
+        f_left[idx[to_right & (side[idx] == 1)]] /= 2
+
+        side[idx] = np.where(to_left, -1, 1)
+
+        active[idx] = (np.abs(x_new - x_curr[idx]) >= accuracy) & (f_new != 0)
+        x_curr[idx] = x_new
+
+    with np.errstate(all='ignore'):
+        f_curr = np.broadcast_to(np.asarray(f(x_curr), dtype=float), x_curr.shape)
+
+    not_poles = np.abs(f_curr) <= f_bound
+
+    roots = np.concatenate((x[exact], x_curr[not_poles]))
+    values = np.concatenate((y[exact], f_curr[not_poles]))
+    order = np.argsort(roots)
+
+    return roots[order], values[order], iteration, f.evaluations
 
 
 def secant_method(func, x0, x1, accuracy, max_iter=100):
-    try:
-        allowed_names = {'x': None, 'math': math}
-        code = compile(func, "<string>", "eval")
+    """
+    ## Solves f(x) = 0 using the secant method.
 
-        for name in code.co_names:
-            if name not in allowed_names:
-                raise ValueError(f"Использование '{name}' запрещено")
-        
-        f = lambda x: eval(func, {'__builtins__': None}, {'x': x, 'math': math})
+    The value at the previous point is carried forward, so every iteration costs
+    exactly one evaluation of f.
+
+    ### Parameters:
+    - func - string with function f(x) of the form: "math.cos(x) - x"
+    - x0, x1 - two initial approximations
+    - accuracy - accuracy
+    - max_iter - maximum number of iterations (default 100)
+
+    ### Returns a tuple of values:
+    - found root of the equation: x
+    - found value of the function at the root: f(x)
+    - number of iterations performed
+    - number of evaluations of f
+    """
+
+    try:
+        f = counted_expression(func)
 
     except Exception as e:
         print(f"Ошибка в функции: {e}")
-        return None, None, 0
+        return None, None, 0, 0
 
-    for iteration in range(1, max_iter + 1):
-        try:
-            f_x0 = f(x0)
-            f_x1 = f(x1)
-        except:
-            print("Ошибка при вычислении функции на {iteration} итерации")
-            return None, None, iteration
+    try:
+        f_x0 = f(x0)
+        f_x1 = f(x1)
+    except:
+        print("Ошибка при вычислении функции в начальных точках")
+        return None, None, 0, f.evaluations
 
+    for iteration in range(1, max_iter + 1):
         if abs(f_x1) < accuracy:
-            return x1, f_x1, iteration
+            return x1, f_x1, iteration, f.evaluations
 
         try:
             denominator = f_x1 - f_x0
             if abs(denominator) < 1e-15:
-                return None, None, iteration
+                return None, None, iteration, f.evaluations
             
             x_next = x1 - f_x1 * (x1 - x0) / denominator
 
         except ZeroDivisionError:
-            return None, None, iteration
+            return None, None, iteration, f.evaluations
 
         x0, x1 = x1, x_next
 
+        try:
+            f_x0, f_x1 = f_x1, f(x1)
+        except:
+            print(f"Ошибка при вычислении функции на {iteration} итерации")
+            return None, None, iteration, f.evaluations
+
         if abs(x1 - x0) < accuracy:
-            return x1, f(x1), iteration
+            return x1, f_x1, iteration, f.evaluations
 
-    return None, None, max_iter
+    return None, None, max_iter, f.evaluations
 
 
 def simple_iteration_method(func: str, a: float, b: float, accuracy: float, max_iter: int=100):
@@ -105,28 +336,22 @@ def simple_iteration_method(func: str, a: float, b: float, accuracy: float, max_
     - found root of the equation: x
     - found value of the function at the root: f(x)
     - number of iterations performed
+    - number of evaluations of φ
     """
 
     try:
-        allowed_names = {'x': None, 'math': math}
-        code = compile(func, "<string>", "eval")
-
-        for name in code.co_names:
-            if name not in allowed_names:
-                raise ValueError(f"Запрещённое имя: '{name}'")
-        
-        phi = lambda x: eval(func, {'__builtins__': None}, {'x': x, 'math': math})
+        phi = counted_expression(func)
 
     except Exception as e:
         print(f"Ошибка в функции: {e}")
 
-        return None, None, 0
+        return None, None, 0, 0
 
     try:
         phi_a, phi_b = phi(a), phi(b)
     except:
         print("Ошибка при вычислении φ(a) или φ(b)")
-        return None, None, 0
+        return None, None, 0, phi.evaluations
 
     if not (a <= phi_a <= b) or not (a <= phi_b <= b):
         print("φ не отображает [a, b] в себя! Метод может не сойтись.")
@@ -138,82 +363,350 @@ def simple_iteration_method(func: str, a: float, b: float, accuracy: float, max_
             x_next = phi(x_prev)
         except:
             print("Ошибка вычисления φ(x)")
-            return None, None, iteration
+            return None, None, iteration, phi.evaluations
+
+        if x_next < a or x_next > b:
+            print(f"x вышло за границы [{a}, {b}]")
+            return None, None, iteration, phi.evaluations
+
+        if abs(x_next - x_prev) < accuracy:
+            return x_next, phi(x_next), iteration, phi.evaluations
+
+        x_prev = x_next
+
+    print(f"Не сошлось за {max_iter} итераций.")
+
+    return None, None, max_iter, phi.evaluations
+
+
+# Differences of the iterates below ROUNDING_SCALE * |x| carry less than half of the significant digits
+ROUNDING_SCALE = math.sqrt(np.finfo(float).eps)
+
+
+def steffensen_method(func: str, a: float, b: float, accuracy: float, max_iter: int=100):
+    """
+    ## Solves x = φ(x) using simple iterations accelerated by Aitken's Δ² process (Steffensen's method).
+
+    Every step makes two simple iterations x1 = φ(x), x2 = φ(x1) and jumps to the Aitken
+    extrapolation x - (x1 - x)² / (x2 - 2·x1 + x), which turns the linear convergence of
+    simple iterations into quadratic one. The ratio (x2 - x1) / (x1 - x) estimates the
+    contraction factor q of φ while x1 - x is well above the accuracy and the rounding of x,
+    near the root both differences are rounding noise and the last reliable ratio is kept.
+
+    ### Parameters:
+    - func - string with function φ(x) of the form: "math.cos(x)"
+    - a, b - interval boundaries
+    - accuracy - accuracy
+    - max_iter - maximum number of iterations (default 100)
+
+    ### Returns a tuple of values:
+    - found root of the equation: x
+    - found value of the function at the root: f(x)
+    - number of iterations performed
+    - number of evaluations of φ
+    - estimated contraction factor q (None if no step gave a reliable ratio)
+    """
+
+    try:
+        phi = counted_expression(func)
+
+    except Exception as e:
+        print(f"Ошибка в функции: {e}")
+
+        return None, None, 0, 0, None
+
+    x_prev = (a + b) / 2
+    q = None
+
+    for iteration in range(1, max_iter + 1):
+        try:
+            x1 = phi(x_prev)
+            x2 = phi(x1)
+        except:
+            print("Ошибка вычисления φ(x)")
+            return None, None, iteration, phi.evaluations, None
+
+        d1, d2 = x1 - x_prev, x2 - x1
+        if abs(d1) > max(accuracy, ROUNDING_SCALE * abs(x_prev)):
+            q = d2 / d1
+
+        # Without the second difference there is nothing to extrapolate
+        if d2 == d1:
+            x_next = x2
+        else:
+            x_next = x_prev - d1 * d1 / (d2 - d1)
 
         if x_next < a or x_next > b:
             print(f"x вышло за границы [{a}, {b}]")
-            return None, None, iteration
+            return None, None, iteration, phi.evaluations, None
 
         if abs(x_next - x_prev) < accuracy:
-            return x_next, phi(x_next), iteration
+            return x_next, phi(x_next), iteration, phi.evaluations, q
 
         x_prev = x_next
 
     print(f"Не сошлось за {max_iter} итераций.")
 
-    return None, None, max_iter
+    return None, None, max_iter, phi.evaluations, None
 
 
-def newton_method(equation: str, x0: float, y0: float, tol: float, max_iter: int=100, h: float=1e-6) -> tuple[float, float, float, float, int]:
+def newton_system(equation: str, x0, tol: float, max_iter: int=100) -> tuple[np.ndarray, np.ndarray, int, int]:
     """
-    ### Solves a system of equations using Newton's method.
+    ### Solves a system of equations of any size using Newton's method.
+
+    The Jacobian is derived symbolically once per system (see parse_system), so every
+    iteration costs a single evaluation of F and J together.
 
     #### Parameters:
-    - equation: string like "x**2 + y = 4; y = sin(x)"
-    - x0, y0: initial guesses
+    - equation: string like "x**2 + y = 4; y = sin(x)" or "x1 + x2 + x3 = 6; x1*x2 = 2; x3 - x1 = 2"
+    - x0: initial guess, one value per unknown in the order of parse_system
     - tol: precision
     - max_iter: maximum number of iterations (default 100)
-    - h: step for numerical Jacobian (default 1e-6)
 
     #### Returns a tuple of values:
-    - root of system x
-    - root of system y
-    - value of first function in (x, y)
-    - value of second function in (x, y)
+    - root of system (vector)
+    - values of the functions at the root (vector)
     - number of iterations
+    - number of evaluations of F and J
     """
 
     try:
-        F = parse_equations(equation)
-        
+        variables, F, FJ = parse_system(equation)
+
     except ValueError as e:
         print(f"Ошибка парсинга уравнений: {e}")
-        return None, None, None, None, 0
-    
-    x, y = x0, y0
+        return None, None, 0, 0
+
+    x = np.array(x0, dtype=float)
+
+    if len(x) != len(variables):
+        print(f"Начальное приближение должно задавать {len(variables)} неизвестных: {', '.join(variables)}")
+        return None, None, 0, 0
+    evaluations = 0
+
     for iteration in range(1, max_iter + 1):
-        F_val = np.array(F(x, y))
-        
-        J = np.zeros((2, 2))
-        
-        # df1/dx, df1/dy
-        f1_x_plus_h = F(x + h, y)[0]
-        f1_y_plus_h = F(x, y + h)[0]
-        J[0, 0] = (f1_x_plus_h - F_val[0]) / h
-        J[0, 1] = (f1_y_plus_h - F_val[0]) / h
-        
-        # df2/dx, df2/dy
-        f2_x_plus_h = F(x + h, y)[1]
-        f2_y_plus_h = F(x, y + h)[1]
-        J[1, 0] = (f2_x_plus_h - F_val[1]) / h
-        J[1, 1] = (f2_y_plus_h - F_val[1]) / h
-        
+        F_val, J = FJ(x)
+        evaluations += 1
+
         try:
-            dx, dy = np.linalg.solve(J, -F_val)
+            dx = np.linalg.solve(J, -F_val)
 
         except np.linalg.LinAlgError:
             print("Матрица Якоби вырождена!")
-            return None, None, None, None, iteration
-        
+            return None, None, iteration, evaluations
+
         x += dx
-        y += dy
-        
-        if np.sqrt(dx**2 + dy**2) < tol:
-            f1, f2 = F(x, y)
-            return x, y, f1, f2, iteration
-    
+
+        if np.linalg.norm(dx) < tol:
+            # Only F is needed at the root, not the Jacobian
+            return x, F(x), iteration, evaluations + 1
+
     print(f"Не сошлось за {max_iter} итераций.")
-    f1, f2 = F(x, y)
 
-    return x, y, f1, f2, max_iter
+    return x, F(x), max_iter, evaluations + 1
+
+
+def broyden_method(equation: str, x0, tol: float, max_iter: int=100) -> tuple[np.ndarray, np.ndarray, int, int]:
+    """
+    ### Solves a system of equations of any size using Broyden's (quasi-Newton) method.
+
+    The Jacobian is computed only once, at the initial guess. After that its inverse is
+    corrected by a rank-one (Sherman–Morrison) update, so every iteration costs a single
+    evaluation of F and O(n²) operations instead of a Jacobian and a linear solve.
+
+    #### Parameters:
+    - equation: string like "x**2 + y = 4; y = sin(x)"
+    - x0: initial guess, one value per unknown in the order of parse_system
+    - tol: precision
+    - max_iter: maximum number of iterations (default 100)
+
+    #### Returns a tuple of values:
+    - root of system (vector)
+    - values of the functions at the root (vector)
+    - number of iterations
+    - number of evaluations of F (the first one together with J)
+    """
+
+    try:
+        variables, F, FJ = parse_system(equation)
+
+    except ValueError as e:
+        print(f"Ошибка парсинга уравнений: {e}")
+        return None, None, 0, 0
+
+    x = np.array(x0, dtype=float)
+
+    if len(x) != len(variables):
+        print(f"Начальное приближение должно задавать {len(variables)} неизвестных: {', '.join(variables)}")
+        return None, None, 0, 0
+
+    F_val, J = FJ(x)
+    evaluations = 1
+
+    try:
+        J_inv = np.linalg.inv(J)
+
+    except np.linalg.LinAlgError:
+        print("Матрица Якоби вырождена!")
+        return None, None, 0, evaluations
+
+    for iteration in range(1, max_iter + 1):
+        dx = -J_inv @ F_val
+        x += dx
+
+        F_new = F(x)
+        evaluations += 1
+
+        if np.linalg.norm(dx) < tol:
+            return x, F_new, iteration, evaluations
+
+        dF = F_new - F_val
+        J_inv_dF = J_inv @ dF
+        denominator = dx @ J_inv_dF
+
+        if abs(denominator) < 1e-300:
+            print("Обновление Бройдена вырождено!")
+            return None, None, iteration, evaluations
+
+        J_inv += np.outer(dx - J_inv_dF, dx @ J_inv) / denominator
+        F_val = F_new
+
+    print(f"Не сошлось за {max_iter} итераций.")
+
+    return x, F_val, max_iter, evaluations
+
+
+def newton_multistart(equation: str, starts, tol: float, max_iter: int=50) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    ### Runs Newton's method from many initial guesses at once.
+
+    All starting points are iterated together as NumPy arrays: F and J are evaluated for the
+    whole batch in one call and the linear systems are solved in one batched solve. Points that
+    converged, met a singular Jacobian or ran away are masked out of the following iterations.
+
+    #### Parameters:
+    - equation: string like "x**3 - 3*x*y**2 = 1; 3*x**2*y - y**3 = 0"
+    - starts: array of shape (M, n) with the initial guesses
+    - tol: precision
+    - max_iter: maximum number of iterations (default 50)
+
+    #### Returns a tuple of values:
+    - array (M, n) of the points reached from every start
+    - boolean array (M,), True where the iterations converged
+    - array (M,) with the number of iterations for every start
+
+    #### Raises:
+    - ValueError: if the system cannot be parsed or the number of unknowns differs from n
+    """
+
+    variables, _, FJ = parse_system(equation)
+
+    x = np.array(starts, dtype=float)
+
+    if x.shape[-1] != len(variables):
+        raise ValueError(f"Система должна содержать {x.shape[-1]} неизвестных (по числу координат начальных точек), получено {len(variables)}")
+    converged = np.zeros(len(x), dtype=bool)
+    active = np.ones(len(x), dtype=bool)
+    iterations = np.zeros(len(x), dtype=int)
+
+    for _ in range(max_iter):
+        idx = np.flatnonzero(active)
+        if len(idx) == 0:
+            break
+
+        with np.errstate(all='ignore'):
+            F_val, J = FJ(x[idx])
+            det = np.linalg.det(J)
+
+        # Singular or broken Jacobians leave the batch
+        ok = np.isfinite(det) & (det != 0) & np.isfinite(F_val).all(axis=1)
+        active[idx[~ok]] = False
+        idx, F_val, J = idx[ok], F_val[ok], J[ok]
+
+        dx = np.linalg.solve(J, -F_val[..., None])[..., 0]
+        x[idx] += dx
+        iterations[idx] += 1
+
+        step = np.linalg.norm(dx, axis=1)
+        done = step < tol
+        diverged = ~np.isfinite(x[idx]).all(axis=1) | (np.abs(x[idx]).max(axis=1) > 1e12)
+
+        converged[idx[done]] = True
+        active[idx[done | diverged]] = False
+
+    return x, converged, iterations
+
+
+def newton_basins(equation: str, x_bounds: tuple, y_bounds: tuple, tol: float, resolution: int=200, max_iter: int=50) -> tuple[np.ndarray, np.ndarray]:
+    """
+    ### Maps the basins of attraction of Newton's method for a system of two equations.
+
+    A resolution x resolution grid of starting points is solved by newton_multistart in one run.
+
+    #### Parameters:
+    - equation: string like "x**3 - 3*x*y**2 = 1; 3*x**2*y - y**3 = 0"
+    - x_bounds, y_bounds: ranges of the starting points
+    - tol: precision
+    - resolution: number of starting points along each axis (default 200)
+    - max_iter: maximum number of iterations (default 50)
+
+    #### Returns a tuple of values:
+    - array (k, 2) of the distinct roots found
+    - image (resolution, resolution): index of the root reached from every start, -1 if none
+
+    #### Raises:
+    - ValueError: if the system cannot be parsed or does not have exactly two unknowns
+    """
+
+    xs = np.linspace(*x_bounds, resolution)
+    ys = np.linspace(*y_bounds, resolution)
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    starts = np.column_stack((grid_x.ravel(), grid_y.ravel()))
+
+    points, converged, _ = newton_multistart(equation, starts, tol, max_iter)
+
+    # Group the converged points around the distinct roots
+    radius = max(100 * tol, 1e-9)
+    labels = np.full(len(points), -1)
+    roots = []
+
+    unlabeled = converged.copy()
+    while unlabeled.any():
+        root = points[np.flatnonzero(unlabeled)[0]]
+        close = unlabeled & (np.linalg.norm(points - root, axis=1) < radius)
+
+        labels[close] = len(roots)
+        roots.append(points[close].mean(axis=0))
+        unlabeled &= ~close
+
+    return np.array(roots).reshape(-1, 2), labels.reshape(resolution, resolution)
+
+
+def newton_method(equation: str, x0: float, y0: float, tol: float, max_iter: int=100) -> tuple[float, float, float, float, int, int]:
+    """
+    ### Solves a system of two equations using Newton's method.
+
+    #### Parameters:
+    - equation: string like "x**2 + y = 4; y = sin(x)"
+    - x0, y0: initial guesses
+    - tol: precision
+    - max_iter: maximum number of iterations (default 100)
+
+    #### Returns a tuple of values:
+    - root of system x
+    - root of system y
+    - value of first function in (x, y)
+    - value of second function in (x, y)
+    - number of iterations
+    - number of evaluations of F and J (see newton_system)
+    """
+
+    root, F_val, iterations, evaluations = newton_system(equation, [x0, y0], tol, max_iter)
+
+    if root is None or len(root) != 2:
+        return None, None, None, None, iterations, evaluations
+
+    x, y = root
+    f1, f2 = F_val
 
+    return x, y, f1, f2, iterations, evaluations
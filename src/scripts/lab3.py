@@ -1,64 +1,353 @@
 import math
+import heapq
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .expressions import compile_expression
+
+# Positive Kronrod nodes on [-1, 1] and the 15-point Kronrod / 7-point Gauss weights for them (QUADPACK qk15)
+_XGK = np.array([0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+                 0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+                 0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+                 0.207784955007898467600689403773245, 0.0])
+_WGK = np.array([0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+                 0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+                 0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+                 0.204432940075298892414161999234649, 0.209482141084727828012999174891714])
+_WG = np.array([0.0, 0.129484966168869693270611432679082, 0.0, 0.279705391489276667901467771423780,
+                0.0, 0.381830050505118944950369775488975, 0.0, 0.417959183673469387755102040816327])
+
+KRONROD_NODES = np.concatenate((-_XGK, _XGK[-2::-1]))
+KRONROD_WEIGHTS = np.concatenate((_WGK, _WGK[-2::-1]))
+GAUSS_WEIGHTS = np.concatenate((_WG, _WG[-2::-1]))
+
 
 def evaluate_function(func_str, x):
     """Calculates the value of the function func_str at point x"""
     try:
-        # Replace '^' with '**' to support exponent notation
-        func_str = func_str.replace('^', '**')
         # Calculate the value of the function at point x
-        return eval(func_str, {'x': x, 'math': math, 'sin': math.sin, 'cos': math.cos, 
-                              'exp': math.exp, 'sqrt': math.sqrt, 'log': math.log})
+        return compile_expression(func_str)(x)
+    except Exception as e:
+        raise ValueError(f"Error evaluating function: {e}")
+
+
+def evaluate_grid(func_str, x):
+    """Calculates the values of the function func_str at all nodes of the array x in one pass"""
+    try:
+        f = compile_expression(func_str, backend='numpy')
+        with np.errstate(divide='raise', over='raise', invalid='raise'):
+            y = f(x)
+        # A constant integrand gives a scalar, so spread it over the grid
+        return np.broadcast_to(np.asarray(y, dtype=float), x.shape)
     except Exception as e:
         raise ValueError(f"Error evaluating function: {e}")
 
 
+def runge_correction(I_h, I_h2, k):
+    """Runge's estimate of the error of I_h2 for a method of order k (I_h is computed with twice the step)"""
+    return (I_h2 - I_h) / (2**k - 1)
+
+
 def runge_rule(I_h, I_h2, k, eps):
     """Accuracy check using Runge's rule"""
-    return abs(I_h - I_h2) / (2**k - 1) < eps
+    return abs(runge_correction(I_h, I_h2, k)) < eps
 
 
 def rectangle_left(func_str, a, b, n):
     """Left rectangle method"""
     h = (b - a) / n
-    return h * sum(evaluate_function(func_str, a + i * h) for i in range(n))
+    return h * grid_sum(func_str, a, h, n)
 
 
 def rectangle_right(func_str, a, b, n):
     """Right Rectangle Method"""
     h = (b - a) / n
-    return h * sum(evaluate_function(func_str, a + (i + 1) * h) for i in range(n))
+    return h * grid_sum(func_str, a, h, n, start=1)
 
 
 def rectangle_mid(func_str, a, b, n):
     """Mean Rectangle Method"""
     h = (b - a) / n
-    return h * sum(evaluate_function(func_str, a + (i + 0.5) * h) for i in range(n))
+    return h * grid_sum(func_str, a, h, n, shift=0.5)
 
 
 def trapezoidal(func_str, a, b, n):
     """Trapezoid Method"""
     h = (float(b) - float(a)) / n
-    return h * (0.5 * (evaluate_function(func_str, a) + evaluate_function(func_str, b)) + 
-                sum(evaluate_function(func_str, a + i * h) for i in range(1, n)))
+    ya, yb = evaluate_grid(func_str, np.array([a, b], dtype=float))
+    return h * (0.5 * float(ya + yb) + grid_sum(func_str, float(a), h, n - 1, start=1))
 
 
 def simpson(func_str, a, b, n):
     """Simpson's Method"""
     if n % 2 != 0:
         n += 1  # make sure that n is even
-    h = (b - a) / n
-    sum_odd = sum(evaluate_function(func_str, a + (2 * i - 1) * h) for i in range(1, n // 2 + 1))
-    sum_even = sum(evaluate_function(func_str, a + 2 * i * h) for i in range(1, n // 2))
-    return h / 3 * (evaluate_function(func_str, a) + evaluate_function(func_str, b) + 
-                    4 * sum_odd + 2 * sum_even)
+    h = (float(b) - float(a)) / n
+    ya, yb = evaluate_grid(func_str, np.array([a, b], dtype=float))
+    sum_odd = grid_sum(func_str, float(a), 2 * h, n // 2, shift=0.5)
+    sum_even = grid_sum(func_str, float(a), 2 * h, n // 2 - 1, start=1)
+    return h / 3 * (float(ya + yb) + 4 * sum_odd + 2 * sum_even)
+
+
+# Nodes evaluated at once: the memory of a grid sum does not grow with n
+GRID_CHUNK = 2**20
+
+# Largest number of nodes of one grid, the accuracy needing more is refused
+MAX_GRID_NODES = 2**26
+
+
+def grid_sum(func_str, a, h, count, shift=0.0, start=0):
+    """
+    Sum of f(a + h * (i + shift)) over i = start, ..., start + count - 1,
+    evaluated over chunks of GRID_CHUNK nodes
+
+    Raises:
+        ValueError: If the grid has more than MAX_GRID_NODES nodes.
+    """
+    if count > MAX_GRID_NODES:
+        raise ValueError(f"Требуемая точность не достигнута: сетка больше {MAX_GRID_NODES} узлов")
+
+    total = 0.0
+    for first in range(start, start + count, GRID_CHUNK):
+        i = np.arange(first, min(first + GRID_CHUNK, start + count))
+        total += float(np.sum(evaluate_grid(func_str, a + h * (i + shift))))
+
+    return total
+
+
+def refine_grid(func_str, a, b):
+    """
+    Yields the node sums of the grids with 2, 4, 8, ... subintervals on [a, b].
+
+    Every doubling evaluates only the midpoints of the previous grid, all the other
+    nodes are carried forward in the running sum. Each level is a tuple
+    (n, h, f(a), f(b), sum over interior nodes, sum over the nodes added on this level)
+
+    Raises:
+        ValueError: If a level needs more than MAX_GRID_NODES new nodes (see grid_sum).
+    """
+    fa, fb = (float(y) for y in evaluate_grid(func_str, np.array([a, b], dtype=float)))
+    n, h, inner = 1, b - a, 0.0
+
+    while True:
+        new = grid_sum(func_str, a, h, n, shift=0.5)
+        n, h, inner = 2 * n, h / 2, inner + new
+        yield n, h, fa, fb, inner, new
+
+
+# Rules rebuilt from a refine_grid level, each returns (n, integral).
+# The middle rectangles with n subintervals use the nodes added on the grid with 2n subintervals,
+# so alone they gain nothing from the refinement: the grid up to 2n costs 2n + 1 evaluations,
+# as much as the direct recalculation (n + n/2 + ...). The rule is useful in compare_methods,
+# where the other methods need that grid anyway
+INCREMENTAL_RULES = {
+    "rectangle_left": lambda n, h, fa, fb, inner, new: (n, h * (fa + inner)),
+    "rectangle_right": lambda n, h, fa, fb, inner, new: (n, h * (inner + fb)),
+    "rectangle_mid": lambda n, h, fa, fb, inner, new: (n // 2, 2 * h * new),
+    "trapezoidal": lambda n, h, fa, fb, inner, new: (n, h * (0.5 * (fa + fb) + inner)),
+    "simpson": lambda n, h, fa, fb, inner, new: (n, h / 3 * (fa + fb + 4 * new + 2 * (inner - new))),
+}
+
+
+def gauss_kronrod(func_str, left, right):
+    """
+    Gauss–Kronrod (7, 15) rule on the segments [left[i], right[i]], all of them in one evaluation.
+    Returns the arrays of the Kronrod estimates and of their error estimates |K - G|
+    """
+    center = (left + right) / 2
+    half = (right - left) / 2
+    y = evaluate_grid(func_str, center[:, None] + half[:, None] * KRONROD_NODES)
+
+    kronrod = half * (y @ KRONROD_WEIGHTS)
+    gauss = half * (y @ GAUSS_WEIGHTS)
+
+    return kronrod, np.abs(kronrod - gauss)
+
+
+def adaptive_gauss_kronrod(func_str, a, b, eps, max_segments=100000):
+    """
+    Adaptive Gauss–Kronrod method
+
+    The segment with the largest error estimate is taken from the priority queue and halved
+    until the total error estimate is below eps, so only the parts of [a, b] with sharp
+    features get a fine subdivision.
+    Returns (integral, error estimate, number of function evaluations)
+    """
+    I, err = gauss_kronrod(func_str, np.array([a], dtype=float), np.array([b], dtype=float))
+    evaluations = len(KRONROD_NODES)
+
+    # heapq is a min-heap, so the segments are ordered by the negative error
+    segments = [(-float(err[0]), float(a), float(b), float(I[0]))]
+    total_err = float(err[0])
+
+    while total_err > eps:
+        if len(segments) >= max_segments:
+            raise ValueError(f"Требуемая точность не достигнута за {max_segments} отрезков")
+
+        neg_err, left, right, _ = heapq.heappop(segments)
+        mid = (left + right) / 2
+
+        if not left < mid < right:
+            raise ValueError("Требуемая точность не достигнута: отрезок не делится дальше")
+
+        I_halves, err_halves = gauss_kronrod(func_str, np.array([left, mid]), np.array([mid, right]))
+        evaluations += 2 * len(KRONROD_NODES)
+
+        for l, r, I_half, err_half in zip((left, mid), (mid, right), I_halves, err_halves):
+            heapq.heappush(segments, (-float(err_half), l, r, float(I_half)))
+
+        total_err += neg_err + float(err_halves.sum())
+
+    # Sum from scratch to get rid of the rounding accumulated by the running totals
+    I = math.fsum(segment[3] for segment in segments)
+    err = math.fsum(-segment[0] for segment in segments)
+
+    return I, err, evaluations
+
+
+def romberg(func_str, a, b, eps, max_levels=30, estimate_error=False):
+    """
+    Romberg method
+
+    Every new trapezoid value of refine_grid starts a row of the Richardson tableau,
+    the row is extrapolated with the Runge corrections of orders 2, 4, 6, ...
+    Stops when the correction of the last column satisfies Runge's rule and the diagonal
+    value agrees with the diagonal value of the previous row within eps.
+    Returns (integral, n), with estimate_error=True (integral, n, error estimate),
+    where the estimate is the difference of the last two diagonal values
+    """
+    trapezoid = INCREMENTAL_RULES["trapezoidal"]
+    levels = refine_grid(func_str, a, b)
+
+    _, T = trapezoid(*next(levels))
+    row = [T]
+
+    for _ in range(max_levels):
+        n, T = trapezoid(*next(levels))
 
+        new_row = [T]
+        for j, prev in enumerate(row, start=1):
+            new_row.append(new_row[-1] + runge_correction(prev, new_row[-1], 2 * j))
 
-def calculate_integral(method, func, a, b, eps, max_iter=1000000):
-    """Calculating an integral with a given accuracy"""
+        # The highest column is trusted only when it also agrees with the previous diagonal value
+        if len(row) > 1 and runge_rule(row[-1], new_row[-2], 2 * len(row), eps) and abs(new_row[-1] - row[-1]) < eps:
+            if estimate_error:
+                return new_row[-1], n, abs(new_row[-1] - row[-1])
+
+            return new_row[-1], n
+
+        row = new_row
+
+    raise ValueError(f"Требуемая точность не достигнута за {max_levels} уровней")
+
+
+def compare_methods(func_str, a, b, eps, max_iter=60):
+    """
+    Calculating an integral with a given accuracy by all five fixed-step methods at once
+
+    Every method is rebuilt from the same refine_grid levels, so each node is evaluated
+    only once for the whole comparison.
+    Returns ({method: (integral, n, Runge error estimate)}, number of function evaluations)
+    """
 
     if a > b:
          a, b = b, a
 
+    results = {}
+    previous = {}
+    levels = refine_grid(func_str, a, b)
+
+    for _ in range(max_iter):
+        level = next(levels)
+
+        for name, rule in INCREMENTAL_RULES.items():
+            if name in results:
+                continue
+
+            k = 2 if name != "simpson" else 4  # Order of accuracy of the method
+            n, I_curr = rule(*level)
+
+            if n < 4:
+                continue
+
+            if name in previous and runge_rule(previous[name], I_curr, k, eps):
+                results[name] = (I_curr, n, abs(runge_correction(previous[name], I_curr, k)))
+
+            previous[name] = I_curr
+
+        if len(results) == len(INCREMENTAL_RULES):
+            # Grid nodes plus both ends
+            return {name: results[name] for name in INCREMENTAL_RULES}, level[0] + 1
+
+    raise ValueError(f"Требуемая точность не достигнута за {max_iter} итераций")
+
+
+# Panels per process by default: the pool hands them out as the processes get free,
+# so a panel with a sharp feature does not leave the other processes idle
+PANELS_PER_WORKER = 4
+
+
+def calculate_integral_parallel(method, func, a, b, eps, panels=None, workers=None, max_iter=1000000, incremental=True):
+    """
+    Calculating an integral with a given accuracy on several processes
+
+    [a, b] is split into equal panels integrated by calculate_integral in a process pool,
+    PANELS_PER_WORKER panels per process by default.
+    Every panel gets eps / panels, so the sum of the per-panel error estimates still respects eps.
+    The per-panel results are summed element-wise: (integral, n, error estimate) for the
+    fixed-step methods and "romberg" (the sum of the per-panel Runge estimates) or
+    (integral, error estimate, number of function evaluations) for "gauss_kronrod"
+    """
+
+    if a > b:
+         a, b = b, a
+
+    workers = workers or os.cpu_count() or 1
+    panels = panels or PANELS_PER_WORKER * workers
+    edges = np.linspace(float(a), float(b), panels + 1)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(calculate_integral, method, func, float(left), float(right), eps / panels,
+                                   max_iter, incremental, 1, True)
+                   for left, right in zip(edges[:-1], edges[1:])]
+        results = [future.result() for future in futures]
+
+    I = math.fsum(result[0] for result in results)
+
+    return (I,) + tuple(sum(column) for column in list(zip(*results))[1:])
+
+
+def calculate_integral(method, func, a, b, eps, max_iter=1000000, incremental=True, workers=1, estimate_error=False):
+    """
+    Calculating an integral with a given accuracy
+
+    Returns (integral, n) for the fixed-step methods and
+    (integral, error estimate, number of function evaluations) for "gauss_kronrod".
+    With estimate_error=True the fixed-step methods and "romberg" return
+    (integral, n, Runge error estimate); the parallel calculation always does.
+    "romberg" extrapolates the trapezoid sequence of refine_grid (see romberg).
+    workers != 1 integrates the panels of [a, b] in parallel (see calculate_integral_parallel),
+    workers=None uses all the cores
+    With incremental=True the grid is refined in place (see refine_grid), so every doubling
+    of n costs only the new nodes instead of a full recalculation by the method.
+    The middle rectangles are always recalculated: their nodes are not shared between
+    the grids of n and 2n subintervals (see INCREMENTAL_RULES)
+    """
+
+    if workers != 1:
+         return calculate_integral_parallel(method, func, a, b, eps, workers=workers, max_iter=max_iter, incremental=incremental)
+
+    if a > b:
+         a, b = b, a
+
+    if method == "gauss_kronrod":
+         return adaptive_gauss_kronrod(func, a, b, eps)
+
+    if method == "romberg":
+         return romberg(func, a, b, eps, estimate_error=estimate_error)
+
+    rule = INCREMENTAL_RULES.get(method) if method != "rectangle_mid" else None
+
     if method == "simpson":
          method = simpson
     elif method == "trapezoidal":
@@ -74,6 +363,27 @@ def calculate_integral(method, func, a, b, eps, max_iter=1000000):
 
     n = 4
     k = 2 if method != simpson else 4  # Order of accuracy of the method
+
+    if incremental and rule is not None:
+        levels = refine_grid(func, a, b)
+
+        # Skip the grids coarser than the first approximation
+        n_curr, I_prev = rule(*next(levels))
+        while n_curr < n:
+            n_curr, I_prev = rule(*next(levels))
+
+        for _ in range(max_iter):
+            n_curr, I_curr = rule(*next(levels))
+
+            if runge_rule(I_prev, I_curr, k, eps):
+                if estimate_error:
+                    return I_curr, n_curr, abs(runge_correction(I_prev, I_curr, k))
+
+                return I_curr, n_curr
+
+            I_prev = I_curr
+
+        raise ValueError(f"Требуемая точность не достигнута за {max_iter} итераций")
     
     # First approximation
     I_prev = method(func, a, b, n)
@@ -83,6 +393,9 @@ def calculate_integral(method, func, a, b, eps, max_iter=1000000):
         I_curr = method(func, a, b, n)
         
         if runge_rule(I_prev, I_curr, k, eps):
+            if estimate_error:
+                return I_curr, n, abs(runge_correction(I_prev, I_curr, k))
+
             return I_curr, n
         
         I_prev = I_curr
@@ -1,8 +1,10 @@
-from math import sin, cos, exp, log, sqrt
 import numpy as np
 import matplotlib.pyplot as plt
 from PIL import Image
 import os
+import sympy
+from scipy import sparse
+from .expressions import compile_expression, free_variables, sort_variables
 
 
 def parse_equations(equation: str):
@@ -14,23 +16,11 @@ def parse_equations(equation: str):
 
     equations = [eq.strip() for eq in equation.split(';') if eq.strip()]
     
-    parsed_equations = []
-    for eq in equations:
-        if '=' in eq:
-            left, right = eq.split('=', 1)
-            parsed_eq = f"({left}) - ({right})"
-        else:
-            parsed_eq = eq
-
-        parsed_equations.append(parsed_eq)
+    parsed_equations = [compile_expression(eq, ('x', 'y')) for eq in equations]
     
     def F(x, y):
         try:
-            allowed_names = {'x': x, 'y': y, 
-                            'sin': sin, 'cos': cos, 'exp': exp, 
-                            'log': log, 'sqrt': sqrt, 'abs': abs}
-            
-            return [eval(eq, {'__builtins__': None}, allowed_names) for eq in parsed_equations]
+            return [f(x, y) for f in parsed_equations]
 
         except Exception as e:
             raise ValueError(f"Error when evaluating equation: {str(e)}")
@@ -38,10 +28,76 @@ def parse_equations(equation: str):
     return F
 
 
-def parse_single_argument_equation(equation: str):
+def parse_system(equation: str):
+    """
+    Parses a string with a system of any size like "x**2 + y = 4; y = sin(x)" or
+    "x1 + x2 + x3 = 6; x1*x2 = 2; x3 - x1 = 2".
+    The Jacobian is derived symbolically once per system, then F and J are compiled
+    together (with common subexpressions shared) into one NumPy function.
+
+    Returns the tuple (variables, F, FJ): the names of the unknowns in the order of the
+    vector components, the function F(point) and the function FJ(point) = (F(point), J(point)).
+    A point may also be a batch of shape (..., n), then F has shape (..., n) and J (..., n, n).
+
+    Raises:
+        ValueError: If the system cannot be parsed or the number of equations
+                    differs from the number of unknowns.
+    """
+
+    equations = [eq.strip() for eq in equation.split(';') if eq.strip()]
+
+    variables = sort_variables({name for eq in equations for name in free_variables(eq)})
+
+    if len(variables) != len(equations):
+        raise ValueError(f"Количество уравнений ({len(equations)}) не совпадает с количеством неизвестных ({len(variables)})")
+
+    # Real symbols: the derivative of abs(x) is then sign(x), not an expression with re(x) and im(x)
+    symbols = [sympy.Symbol(name, real=True) for name in variables]
+
+    try:
+        F = [sympy.sympify(compile_expression(eq, variables, backend='sympy')(*symbols)) for eq in equations]
+        J = [[sympy.diff(f, s) for s in symbols] for f in F]
+
+        compiled_F = sympy.lambdify(symbols, F, 'numpy', cse=True)
+        compiled_FJ = sympy.lambdify(symbols, (F, J), 'numpy', cse=True)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Error when parsing equation: {str(e)}")
+
+    def F_func(point):
+        point = np.asarray(point, dtype=float)
+        try:
+            F_val = compiled_F(*np.moveaxis(point, -1, 0))
+        except Exception as e:
+            raise ValueError(f"Error when evaluating equation: {str(e)}")
+
+        return _stack(F_val, point.shape[:-1])
+
+    def FJ(point):
+        point = np.asarray(point, dtype=float)
+        try:
+            F_val, J_val = compiled_FJ(*np.moveaxis(point, -1, 0))
+        except Exception as e:
+            raise ValueError(f"Error when evaluating equation: {str(e)}")
+
+        shape = point.shape[:-1]
+
+        return _stack(F_val, shape), np.stack([_stack(row, shape) for row in J_val], axis=-2)
+
+    return variables, F_func, FJ
+
+
+def _stack(values, shape):
+    """Stacks the components along the last axis, spreading the constant ones over the batch shape"""
+    return np.stack([np.broadcast_to(np.asarray(value, dtype=float), shape) for value in values], axis=-1)
+
+
+def parse_single_argument_equation(equation: str, backend: str = 'math'):
     """
     Parses a string with an equation like "x**2 + 3 = 4" or "sin(x) + cos(x)".
     Returns a function f(x) that evaluates the expression.
+    With backend='numpy' the function accepts whole NumPy arrays.
 
     Usage examples:
     >>> f = parse_single_argument_equation("x**2 - 4")
@@ -50,23 +106,11 @@ def parse_single_argument_equation(equation: str):
     >>> f(0) # returns 1 (sin(0) + cos(0) = 0 + 1 = 1)
     """
 
-    # Remove spaces and check for the equal sign
-    equation = equation.strip()
-    if '=' in equation:
-        left, right = equation.split('=', 1)
-        parsed_eq = f"({left.strip()}) - ({right.strip()})"
-    else:
-        parsed_eq = equation
+    parsed_eq = compile_expression(equation, backend=backend)
     
     def f(x):
         try:
-            allowed_names = {
-                'x': x,
-                'sin': sin, 'cos': cos, 'tan': lambda x: sin(x)/cos(x),
-                'exp': exp, 'log': log, 'sqrt': sqrt,
-                'pi': 3.141592653589793
-            }
-            return eval(parsed_eq, {'__builtins__': None}, allowed_names)
+            return parsed_eq(x)
         except Exception as e:
             raise ValueError(f"Error in calculating the equation '{equation}': {str(e)}")
     
@@ -74,6 +118,86 @@ def parse_single_argument_equation(equation: str):
 
 
 
+def parse_sparse_matrix(text: str):
+    """
+    Parses an augmented matrix [A|B] of a system with N unknowns given by coordinate triples.
+    The first line is "coo N", every next line is "i j value" with 1-based indices,
+    column N + 1 holds the constant terms. Repeated coordinates are summed.
+
+    Returns a SciPy CSR matrix of shape (N, N + 1).
+
+    Usage examples:
+    >>> A = parse_sparse_matrix("coo 2\n1 1 4\n1 3 5\n2 2 3\n2 3 6")
+    >>> A.toarray() # returns [[4, 0, 5], [0, 3, 6]]
+
+    Raises:
+        ValueError: If the text is malformed or an index is out of the matrix.
+    """
+
+    lines = [line.split() for line in text.strip().split("\n") if line.strip()]
+
+    try:
+        n = int(lines[0][1])
+        triples = np.array(lines[1:], dtype=float).reshape(-1, 3)
+    except (IndexError, ValueError):
+        raise ValueError("Ожидается строка 'coo N' и далее тройки 'i j значение'")
+
+    rows = triples[:, 0].astype(int) - 1
+    columns = triples[:, 1].astype(int) - 1
+
+    if rows.min(initial=0) < 0 or rows.max(initial=0) >= n or columns.min(initial=0) < 0 or columns.max(initial=0) > n:
+        raise ValueError(f"Индексы должны быть в пределах 1..{n} для строк и 1..{n + 1} для столбцов")
+
+    return sparse.csr_array((triples[:, 2], (rows, columns)), shape=(n, n + 1))
+
+
+# Binary matrix file: magic, uint64 rows, uint64 columns, then float64 values row by row (little-endian)
+MATRIX_MAGIC = b"CMBMATRX"
+MATRIX_HEADER = np.dtype([('magic', 'S8'), ('rows', '<u8'), ('columns', '<u8')])
+
+
+def save_binary_matrix(path: str, matrix) -> None:
+    """
+    Writes a dense matrix (e.g. an augmented matrix [A|B]) to the binary matrix file
+    read by load_binary_matrix.
+    """
+
+    matrix = np.asarray(matrix, dtype='<f8')
+
+    if matrix.ndim != 2:
+        raise ValueError("Ожидается двумерная матрица")
+
+    header = np.array([(MATRIX_MAGIC, *matrix.shape)], dtype=MATRIX_HEADER)
+
+    with open(path, "wb") as file:
+        header.tofile(file)
+        np.ascontiguousarray(matrix).tofile(file)
+
+
+def load_binary_matrix(path: str) -> np.memmap:
+    """
+    Opens a binary matrix file written by save_binary_matrix.
+
+    The values are not read or parsed: the file is memory mapped read-only, so opening
+    takes the same time for any size and the pages are loaded by the OS when used.
+
+    Raises:
+        ValueError: If the file is not a matrix file or its size does not match the header.
+    """
+
+    header = np.fromfile(path, dtype=MATRIX_HEADER, count=1)
+
+    if len(header) == 0 or header['magic'][0] != MATRIX_MAGIC:
+        raise ValueError("Файл не является бинарной матрицей")
+
+    rows, columns = int(header['rows'][0]), int(header['columns'][0])
+
+    if os.path.getsize(path) != MATRIX_HEADER.itemsize + rows * columns * 8:
+        raise ValueError(f"Размер файла не соответствует матрице {rows}x{columns}")
+
+    return np.memmap(path, dtype='<f8', mode='r', offset=MATRIX_HEADER.itemsize, shape=(rows, columns))
+
+
 def plot_function_with_highlight(equation, highlight_xmin, highlight_xmax, 
                                total_xmin=None, total_xmax=None, num_points=1000):
     """
@@ -86,7 +210,7 @@ def plot_function_with_highlight(equation, highlight_xmin, highlight_xmax,
     - num_points: number of points to plot
     """
 
-    equation = parse_single_argument_equation(equation)
+    equation = parse_single_argument_equation(equation, backend='numpy')
 
     # Если полный диапазон не указан, расширяем выделенный интервал на 25% в обе стороны
     if total_xmin is None:
@@ -131,3 +255,35 @@ def plot_function_with_highlight(equation, highlight_xmin, highlight_xmax,
     plt.savefig(graph_path, dpi=100, bbox_inches='tight')
 
     return Image.open(graph_path)
+
+
+def plot_basins(labels, roots, x_bounds, y_bounds):
+    """
+    Visualization of the basins of attraction of a system of two equations.
+
+    Parameters:
+    - labels: 2D array, index of the root every starting point converged to (-1 if it did not converge)
+    - roots: array of the distinct roots (x, y)
+    - x_bounds, y_bounds: ranges of the starting points
+    """
+
+    plt.figure(figsize=(8, 8))
+
+    image = np.ma.masked_less(labels, 0)
+    plt.imshow(image, origin='lower', extent=(*x_bounds, *y_bounds), cmap='tab10', interpolation='nearest', aspect='auto')
+
+    if len(roots):
+        plt.scatter(roots[:, 0], roots[:, 1], color='black', marker='x', label='Корни')
+        plt.legend()
+
+    plt.xlabel('x0')
+    plt.ylabel('y0')
+    plt.title('Бассейны притяжения метода Ньютона')
+
+    current_dir = os.path.dirname(__file__)
+    graph_path = os.path.abspath(os.path.join(current_dir, "..", "..", "data", "graph_storage", "graph.png"))
+
+    plt.savefig(graph_path, dpi=100, bbox_inches='tight')
+    plt.close()
+
+    return Image.open(graph_path)